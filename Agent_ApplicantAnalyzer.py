@@ -1,35 +1,14 @@
 import os
-import time
-import requests
 import base64
 
-# Word 파일 처리를 위해 추가
-try:
-    from docx import Document
-except ImportError:
-    pass
-
-def get_api_config():
-    """API_KEY.txt 파일에서 API 키와 모델 이름을 읽어옵니다."""
-    file_path = "API_KEY.txt"
-    if not os.path.exists(file_path):
-        return "", ""
-    try:
-        with open(file_path, "r", encoding="utf-8-sig") as f:
-            content = f.read().strip()
-            if not content:
-                return "", ""
-            parts = [p.strip() for p in content.split(',')]
-            api_key = parts[0].replace('"', '').replace("'", "").strip() if len(parts) > 0 else ""
-            model_name = parts[1].replace('"', '').replace("'", "").strip() if len(parts) > 1 else ""
-            return api_key, model_name
-    except Exception as e:
-        print(f"API 설정 파일을 읽는 중 오류 발생: {e}")
-        return "", ""
+from GeminiClient import generate_content
+from RunContext import current_run
 
 def extract_text_from_docx(file_path):
     """Word 파일에서 텍스트를 추출합니다."""
     try:
+        # python-docx는 Word 파일을 실제로 처리할 때만 불러옵니다.
+        from docx import Document
         doc = Document(file_path)
         return "\n".join([para.text for para in doc.paragraphs])
     except Exception:
@@ -37,14 +16,6 @@ def extract_text_from_docx(file_path):
 
 def call_gemini_api(prompt, file_path=None, system_instruction=""):
     """Gemini API를 호출합니다. PDF는 바이너리, Word/Text는 텍스트 추출 방식으로 처리합니다."""
-    api_key, model_name = get_api_config()
-    
-    if not api_key or not model_name:
-        print("오류: API_KEY.txt 설정이 올바르지 않습니다.")
-        return None
-
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent?key={api_key}"
-    
     parts = []
     
     # 파일 처리 로직
@@ -85,23 +56,7 @@ def call_gemini_api(prompt, file_path=None, system_instruction=""):
         "systemInstruction": {"parts": [{"text": system_instruction}]}
     }
     
-    # 지수 백오프 적용 (재시도 로직)
-    for i in range(5):
-        try:
-            response = requests.post(url, json=payload)
-            if response.status_code == 200:
-                result = response.json()
-                return result.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', "")
-            elif response.status_code == 429:
-                time.sleep(2**i)
-                continue
-            else:
-                print(f"API 호출 에러 (Status {response.status_code}): {response.text}")
-                break
-        except Exception:
-            time.sleep(2**i)
-            continue
-    return None
+    return generate_content(payload, stage="applicant")
 
 def analyze_applicant_info(file_path):
     """지원자 분석을 수행합니다. PDF 및 Word 파일을 지원합니다."""
@@ -113,7 +68,7 @@ def analyze_applicant_info(file_path):
         print(f"지원자 분석 중단: 지원하지 않는 형식입니다. ({file_path})")
         return False
 
-    output_path = os.path.join("res", "Applicant_data.txt")
+    output_path = current_run().output_path("Applicant_data.txt")
     print(f"지원자 분석 중: {os.path.basename(file_path)}")
     
     system_prompt = (
@@ -125,8 +80,6 @@ def analyze_applicant_info(file_path):
     analysis_result = call_gemini_api(user_prompt, file_path, system_prompt)
     
     if analysis_result:
-        if not os.path.exists("res"): 
-            os.makedirs("res")
         with open(output_path, "w", encoding="utf-8") as f:
             f.write(analysis_result)
         print(f"성공: 지원자 분석 결과가 '{output_path}'에 저장되었습니다.")
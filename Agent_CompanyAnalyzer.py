@@ -1,80 +1,41 @@
 import os
-import time
-import requests
 import json
 
-def get_api_config():
-    """
-    API_KEY.txt 파일에서 API 키와 모델 이름을 읽어옵니다.
-    형식: API_KEY,MODEL_NAME (쉼표로 구분)
-    """
-    file_path = "API_KEY.txt"
-    if not os.path.exists(file_path):
-        return "", ""
-    try:
-        # utf-8-sig는 윈도우 메모장 등에서 붙는 BOM 문자를 자동으로 제거합니다.
-        with open(file_path, "r", encoding="utf-8-sig") as f:
-            content = f.read().strip()
-            if not content:
-                return "", ""
-            
-            # 쉼표(,)를 기준으로 분리합니다.
-            parts = [p.strip() for p in content.split(',')]
-            
-            # 따옴표나 기타 공백이 포함되어 있을 경우를 대비해 정밀하게 정제합니다.
-            api_key = parts[0].replace('"', '').replace("'", "").strip() if len(parts) > 0 else ""
-            model_name = parts[1].replace('"', '').replace("'", "").strip() if len(parts) > 1 else ""
-            
-            return api_key, model_name
-    except Exception as e:
-        print(f"API 설정 파일을 읽는 중 오류 발생: {e}")
-        return "", ""
+from GeminiClient import generate_content
+from RunContext import current_run
+from PostingIndex import (PostingIndex, DUPLICATE_THRESHOLD, posting_delta, split_analysis_sections, same_company,
+                          is_same_posting)
 
 def call_gemini_api(prompt, system_instruction=""):
-    api_key, model_name = get_api_config()
-    
-    if not api_key:
-        print("오류: API 키가 비어 있습니다. API_KEY.txt 내용을 확인하세요.")
-        return None
-    if not model_name:
-        print("오류: 모델명이 비어 있습니다. API_KEY.txt의 두 번째 항목을 확인하세요.")
-        return None
-
-    # URL 생성 시 모델명에 공백 등이 섞이지 않도록 재확인
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent?key={api_key}"
-    
     payload = {
         "contents": [{"parts": [{"text": prompt}]}],
         "systemInstruction": {"parts": [{"text": system_instruction}]}
     }
     
-    for i in range(5):
-        try:
-            response = requests.post(url, json=payload)
-            if response.status_code == 200:
-                result = response.json()
-                return result.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', "")
-            elif response.status_code == 429:
-                # 할당량 초과 시 지수 백오프 적용
-                time.sleep(2**i)
-                continue
-            else:
-                # 400 에러 발생 시 에러 메시지 상세 출력
-                print(f"API 호출 에러 (Status {response.status_code}):")
-                print(response.text)
-                # API 키가 유효하지 않다는 메시지가 있으면 즉시 중단
-                if "API key not valid" in response.text:
-                    print("팁: API_KEY.txt 파일에 오타나 불필요한 공백, 따옴표가 없는지 확인하세요.")
-                break
-        except Exception as e:
-            print(f"네트워크 오류: {e}")
-            time.sleep(2**i)
-            continue
-    return None
+    return generate_content(payload, stage="company")
+
+def analyze_job_delta(company_sections, job_delta):
+    """
+    같은 기업의 이전 공고 분석에서 기업 공통 부분(1, 4번)은 그대로 쓰고,
+    이번 공고에만 있는 내용(job_delta)으로 직무별 부분(2, 3번)만 새로 분석합니다.
+    """
+    system_prompt = (
+        "당신은 전문 채용 컨설턴트입니다. 아래 기업의 새 채용 공고에서 달라진 부분만 주어집니다.\n"
+        "다음 두 항목만 같은 번호와 제목으로 정리해 주세요.\n"
+        "2. 직무명과 업무 내용 3. 직무별 자격요건 & 우대 사항\n"
+        "주어진 데이터에 해당 내용이 없다면 '내용 없음'으로 적어주세요"
+    )
+    user_prompt = f"[기업 정보]\n{company_sections[1]}\n\n[새 공고에서 달라진 내용]\n{job_delta}"
+
+    job_part = call_gemini_api(user_prompt, system_prompt)
+    if not job_part:
+        return None
+    return "\n\n".join([company_sections[1], job_part.strip(), company_sections[4]])
 
 def analyze_company_info():
-    input_path = os.path.join("res", "job_description.txt")
-    output_path = os.path.join("res", "Company_data.txt")
+    run = current_run()
+    input_path = run.output_path("job_description.txt")
+    output_path = run.output_path("Company_data.txt")
     
     if not os.path.exists(input_path):
         print(f"오류: {input_path} 파일이 존재하지 않습니다. 먼저 WebCrawling을 실행하세요.")
@@ -87,23 +48,47 @@ def analyze_company_info():
         print(f"공고 파일 읽기 실패: {e}")
         return False
         
-    print("Gemini API를 사용하여 기업 분석을 시작합니다...")
-    
-    system_prompt = (
-        "당신은 전문 채용 컨설턴트입니다. 채용 공고를 분석하여 정리해 주세요.\n"
-        "1. 기업 명칭/산업 2. 직무명과 업무 내용 3. 직무별 자격요건 & 우대 사항 4. 기업 핵심가치 & 인재상 \n"
-        "주어진 데이터에 해당 내용이 없다면 '내용 없음'으로 적어주세요"
-    )
-    user_prompt = f"다음 채용 공고를 분석해줘:\n\n{job_content}"
-    
-    analysis_result = call_gemini_api(user_prompt, system_prompt)
+    # 이전에 분석한 공고 중 같은 공고/같은 기업의 공고가 있으면 결과를 재사용합니다.
+    index = PostingIndex()
+    similar, similarity = index.find_similar(job_content)
+    analysis_result = None
+    if similar and not same_company(similar["analysis"], job_content):
+        # 채용 사이트 공통 문구 때문에 비슷해 보이는 다른 기업의 공고입니다.
+        print(f"유사 공고 발견 (유사도 {similarity:.2f}), 기업명이 달라 새로 분석합니다.")
+        similar = None
+    # 유사도가 높아도 직무 부분이 한 줄이라도 다르면 기업 공통 부분만 재사용합니다.
+    duplicate = bool(similar) and similarity >= DUPLICATE_THRESHOLD and is_same_posting(job_content, similar["content"])
+
+    if duplicate:
+        print(f"유사 공고 발견 (유사도 {similarity:.2f}): 이전 기업 분석 결과를 그대로 재사용합니다.")
+        analysis_result = similar["analysis"]
+    elif similar:
+        company_sections = split_analysis_sections(similar["analysis"])
+        if company_sections:
+            print(f"같은 기업의 공고 발견 (유사도 {similarity:.2f}): 달라진 직무 내용만 분석합니다...")
+            analysis_result = analyze_job_delta(company_sections, posting_delta(job_content, similar["content"]))
+
+    if not analysis_result:
+        print("Gemini API를 사용하여 기업 분석을 시작합니다...")
+
+        system_prompt = (
+            "당신은 전문 채용 컨설턴트입니다. 채용 공고를 분석하여 정리해 주세요.\n"
+            "1. 기업 명칭/산업 2. 직무명과 업무 내용 3. 직무별 자격요건 & 우대 사항 4. 기업 핵심가치 & 인재상 \n"
+            "주어진 데이터에 해당 내용이 없다면 '내용 없음'으로 적어주세요"
+        )
+        user_prompt = f"다음 채용 공고를 분석해줘:\n\n{job_content}"
+
+        analysis_result = call_gemini_api(user_prompt, system_prompt)
     
     if analysis_result:
         try:
-            if not os.path.exists("res"): os.makedirs("res")
             with open(output_path, "w", encoding="utf-8") as f:
                 f.write(analysis_result)
             print(f"성공: 분석 결과가 '{output_path}'에 저장되었습니다.")
+            if not duplicate:
+                first_line = job_content.split("\n", 1)[0]
+                source = first_line.split(":", 1)[1].strip() if first_line.startswith("JOB POSTING SOURCE:") else ""
+                index.add(job_content, analysis_result, source)
             return True
         except Exception as e:
             print(f"결과 저장 실패: {e}")
@@ -1,106 +1,78 @@
 import os
-import time
-import requests
 import re
+import hashlib
 
-def get_api_config():
-    """
-    API_KEY.txt 파일에서 API 키와 모델 이름을 읽어옵니다.
-    형식: API_KEY,MODEL_NAME (쉼표로 구분)
-    """
-    file_path = "API_KEY.txt"
-    if not os.path.exists(file_path):
-        return "", ""
-    try:
-        with open(file_path, "r", encoding="utf-8-sig") as f:
-            content = f.read().strip()
-            if not content:
-                return "", ""
-            parts = [p.strip() for p in content.split(',')]
-            api_key = parts[0].replace('"', '').replace("'", "").strip() if len(parts) > 0 else ""
-            model_name = parts[1].replace('"', '').replace("'", "").strip() if len(parts) > 1 else ""
-            return api_key, model_name
-    except Exception as e:
-        print(f"API 설정 파일을 읽는 중 오류 발생: {e}")
-        return "", ""
+from GeminiClient import generate_content
+from RunContext import current_run
 
-def call_gemini_api(prompt, system_instruction="", cheap_mode=False):   
-    """Gemini API를 호출하여 평가 및 채점을 수행합니다."""
+def call_gemini_api(prompt, system_instruction="", cheap_mode=False, static_prefix=None):   
+    """Gemini API를 호출하여 평가 및 채점을 수행합니다. static_prefix는 프롬프트 캐시로 재사용됩니다."""
 
-    api_key, model_name = get_api_config()
-    if not api_key or not model_name:
-        print("오류: API_KEY.txt 설정이 올바르지 않습니다.")
-        return None
+    #cheap_mode : 싼 gemini model로 전환. 총점 구하기용. (모델 체인은 ModelRouter의 teacher_score 단계 참고)
+    stage = "teacher_score" if cheap_mode else "teacher"
 
-    #cheap_mode : 싼 gemini model로 전환. 총점 구하기용.
-    if cheap_mode:
-        model_name = 'gemini-2.5-flash-lite'
-
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent?key={api_key}"
-    
     payload = {
         "contents": [{"parts": [{"text": prompt}]}],
         "systemInstruction": {"parts": [{"text": system_instruction}]}
     }
     
-    for i in range(5):
-        try:
-            response = requests.post(url, json=payload)
-            if response.status_code == 200:
-                result = response.json()
-                return result.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', "")
-            elif response.status_code == 429:
-                time.sleep(2**i)
-                continue
-            else:
-                break
-        except Exception:
-            time.sleep(2**i)
-            continue
-    return None
-
-def grade_cover_letter():
+    return generate_content(payload, stage=stage, static_prefix=static_prefix)
+
+def grade_cover_letter(return_score=False, on_feedback=None):
     """
     자기소개서를 읽고 Rules.txt에 기반한 20가지 항목으로 채점하여 합격 여부를 반환합니다.
+    return_score=True이면 (합격 여부, 점수) 튜플을 반환합니다. 점수를 구하지 못하면 점수는 None입니다.
+    on_feedback(채점표): 채점표가 나오면 총점을 구하기 전에 호출됩니다 (다음 시도를 미리 시작하는 용도).
     """
     rules_path = "Rules.txt"
-    result_path = os.path.join("res", "result.txt")
+    result_path = current_run().output_path("result.txt")
 
     # 1. Rules.txt 읽기
     if not os.path.exists(rules_path):
         print("오류: Rules.txt 파일이 필요합니다.")
-        return "error"
+        return ("error", None) if return_score else "error"
     
     with open(rules_path, "r", encoding="utf-8") as f:
         rules_content = f.read().strip()
 
     # 2. Rules.txt로부터 20가지 채점 요소 도출
-    print("Agent_Teacher: Rules.txt로부터 20가지 채점 요소를 도출 중...")
-    criteria_prompt = f"""
-    아래의 작성 규칙을 바탕으로, 자기소개서를 평가할 수 있는 구체적인 채점 항목 20가지를 리스트 형태로 도출하세요.
-    각 항목은 5점 만점으로 채점될 예정입니다 (총점 100점).
-    
-    [작성 규칙]
-    {rules_content}
-    """
-    criteria = call_gemini_api(criteria_prompt, "당신은 엄격한 인사팀 평가 위원입니다. 평가 지표만 리스트로 출력하세요.")
+    def derive_criteria():
+        print("Agent_Teacher: Rules.txt로부터 20가지 채점 요소를 도출 중...")
+        criteria_prompt = f"""
+        아래의 작성 규칙을 바탕으로, 자기소개서를 평가할 수 있는 구체적인 채점 항목 20가지를 리스트 형태로 도출하세요.
+        각 항목은 5점 만점으로 채점될 예정입니다 (총점 100점).
+        
+        [작성 규칙]
+        {rules_content}
+        """
+        return call_gemini_api(criteria_prompt, "당신은 엄격한 인사팀 평가 위원입니다. 평가 지표만 리스트로 출력하세요.")
+
+    # 작성 루프 안에서는 같은 채점 항목을 모든 시도에 사용합니다 (시도 간 점수 비교가 가능하도록).
+    # 채점 항목은 작성 루프 체크포인트에도 저장되어, 재시작한 뒤에도 같은 항목을 사용합니다.
+    prompt_cache = current_run().prompt_cache
+    if prompt_cache is not None:
+        rules_hash = hashlib.sha256(rules_content.encode("utf-8")).hexdigest()
+        criteria = prompt_cache.remember(f"teacher_criteria:{rules_hash}", derive_criteria)
+    else:
+        criteria = derive_criteria()
 
     print(f'--------------------criteria--------------------\n{criteria}')
     
     # 3. Writer가 작성한 자기소개서 읽기
     if not os.path.exists(result_path):
-        print("오류: res/result.txt 파일이 존재하지 않습니다.")
-        return "error"
+        print(f"오류: {result_path} 파일이 존재하지 않습니다.")
+        return ("error", None) if return_score else "error"
     
     with open(result_path, "r", encoding="utf-8") as f:
         cover_letter = f.read().strip()
 
     # 4. 자기소개서 채점
     print("Agent_Teacher: 도출된 항목을 바탕으로 자기소개서 채점 시작...")
-    grading_prompt = f"""
+    rubric = f"""
     [평가 항목]
     {criteria}
-
+    """
+    grading_prompt = f"""
     [자기소개서 본문]
     {cover_letter}
 
@@ -110,12 +82,13 @@ def grade_cover_letter():
     채점표 이외에 다른 내용은 일절 작성하지 마세요.
     """
     
-    scorecard = call_gemini_api(grading_prompt, "당신은 매우 보수적인 채용 전문가입니다. 채점표만 작성하세요.")
+    scorecard = call_gemini_api(grading_prompt, "당신은 매우 보수적인 채용 전문가입니다. 채점표만 작성하세요.",
+                                static_prefix=rubric)
 
     print(f'--------------------scorecard--------------------\n{scorecard}')
 
     # 5. 채점표를 teacher_feedback.txt로 저장
-    output_dir = "res"
+    output_dir = current_run().output_dir
     file_path = os.path.join(output_dir, "teacher_feedback.txt")
 
     if not os.path.exists(output_dir):
@@ -125,6 +98,9 @@ def grade_cover_letter():
     with open(file_path, "w", encoding="utf-8") as f:
         f.write(scorecard)
 
+    if on_feedback and scorecard:
+        on_feedback(scorecard)
+
 
     # 6. 총점 출력
     print("Agent_Teacher: 도출된 항목을 바탕으로 자기소개서 채점 시작...")
@@ -146,13 +122,14 @@ def grade_cover_letter():
         # 5. 결과 판단
         if score >= 90:
             print("결과: PASS (yes)")
-            return "yes"
+            result = "yes"
         else:
             print("결과: FAIL (no)")
-            return "no"
+            result = "no"
+        return (result, score) if return_score else result
     except Exception as e:
         print(f"점수 파싱 오류: {score_text}")
-        return "error"
+        return ("error", None) if return_score else "error"
 
 if __name__ == "__main__":
     grade_cover_letter()
@@ -0,0 +1,276 @@
+"""
+여러 채용공고 URL(또는 채용 목록 페이지)을 한 번에 병렬로 수집하는 크롤 프론티어입니다.
+
+- 목록 페이지는 개별 공고 링크로 펼치고, 정규화한 URL(canonical URL)로 중복을 제거합니다.
+- 호스트별 동시 요청 수 제한, 요청 간격(crawl delay), robots.txt를 지킵니다.
+- 먼저 requests로 가져오고, 본문이 거의 없는 페이지(자바스크립트 렌더링)만 Selenium으로 다시 가져옵니다.
+- 공고마다 WebCrawling과 같은 형식의 텍스트 파일(출처 헤더 + 본문)을 결과 폴더의 postings/에 저장합니다.
+"""
+import re
+import time
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, urljoin
+from urllib.robotparser import RobotFileParser
+
+from RunContext import current_run, use_run, RunAborted
+from WebCrawling import USER_AGENT, extract_clean_text, write_posting_file, fetch_rendered_html
+
+MAX_WORKERS = 8
+PER_HOST_CONCURRENCY = 2
+CRAWL_DELAY_SECONDS = 1.0       # 같은 호스트에 요청을 시작하는 최소 간격 (robots.txt의 Crawl-delay가 더 크면 그 값)
+BROWSER_CONCURRENCY = 2         # 동시에 띄우는 Chrome 수
+MAX_POSTINGS = 50
+MIN_TEXT_CHARS = 300            # requests로 받은 본문이 이보다 짧으면 브라우저로 다시 가져옴
+MIN_LISTING_LINKS = 2           # 공고 링크가 이 개수 이상인 페이지는 목록 페이지로 보고 펼침
+POSTINGS_DIR = "postings"
+
+# 개별 공고로 보이는 링크: /recruit/9113, /jobs/12345, ?rec_idx=123 등
+_POSTING_PATH = re.compile(
+    r"/(recruit\w*|jobs?|careers?|positions?|postings?|openings?|vacanc(?:y|ies)|job-?detail\w*)/[^?#]*\d", re.I
+)
+_POSTING_QUERY = re.compile(r"(?:^|&)(job_?id|jobid|posting_?id|rec_?idx|rt_?seq|recruit_?no|id)=\d+", re.I)
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|gclid|fbclid|ref|referrer|source|trk\w*)$", re.I)
+
+
+def canonicalize_url(url):
+    """
+    중복 제거용 URL 정규화: 스킴/호스트 소문자, 기본 포트·fragment·추적 파라미터 제거,
+    쿼리 파라미터 정렬, 끝의 '/' 제거.
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _TRACKING_PARAMS.match(k)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def looks_like_posting(url):
+    parts = urlsplit(url)
+    return bool(_POSTING_PATH.search(parts.path) or _POSTING_QUERY.search(parts.query))
+
+
+def extract_posting_links(html, base_url):
+    """페이지의 링크 중 개별 공고로 보이는 링크를 (정규화 URL 기준 중복 없이) 반환합니다."""
+    from bs4 import BeautifulSoup
+
+    links, seen = [], set()
+    base = canonicalize_url(base_url)
+    for anchor in BeautifulSoup(html, "html.parser").find_all("a", href=True):
+        url = urljoin(base_url, anchor["href"])
+        if not url.startswith(("http://", "https://")) or not looks_like_posting(url):
+            continue
+        canonical = canonicalize_url(url)
+        if canonical != base and canonical not in seen:
+            seen.add(canonical)
+            links.append(url)
+    return links
+
+
+class _Host:
+    """호스트별 robots.txt, 진행 중인 요청 수, 다음 요청 가능 시각입니다."""
+
+    def __init__(self, delay):
+        self.robots = None
+        self.robots_lock = threading.Lock()
+        self.in_flight = 0
+        self.next_start = 0.0
+        self.delay = delay
+
+
+class CrawlFrontier:
+    def __init__(self, max_workers=MAX_WORKERS, per_host=PER_HOST_CONCURRENCY, crawl_delay=CRAWL_DELAY_SECONDS,
+                 max_postings=MAX_POSTINGS, respect_robots=True):
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.crawl_delay = crawl_delay
+        self.max_postings = max_postings
+        self.respect_robots = respect_robots
+        self._hosts = {}
+        self._seen = set()
+        self._queue = deque()          # (url, 목록 페이지로 펼칠지 여부)
+        self._lock = threading.Lock()
+        self._browser_slots = threading.Semaphore(BROWSER_CONCURRENCY)
+        self.results = []
+
+    def add(self, url, expand=True):
+        """
+        수집할 URL을 추가합니다. 이미 추가한 URL(정규화 기준)이면 False를 반환합니다.
+        expand=True이면 목록 페이지일 경우 개별 공고로 펼칩니다.
+        """
+        canonical = canonicalize_url(url)
+        with self._lock:
+            if canonical in self._seen:
+                return False
+            self._seen.add(canonical)
+            self._queue.append((url, expand))
+            return True
+
+    def _host(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = _Host(self.crawl_delay)
+            return self._hosts[host]
+
+    # --- 네트워크 ---
+
+    def _http_get(self, url):
+        """requests로 페이지를 가져옵니다. 취소 시 세션을 닫아 중단합니다."""
+        import requests
+
+        run = current_run()
+        session = requests.Session()
+        token = run.register(session.close)
+        try:
+            return session.get(url, headers={"User-Agent": USER_AGENT}, timeout=run.request_timeout())
+        finally:
+            run.unregister(token)
+            session.close()
+
+    def _allowed(self, url):
+        """robots.txt를 호스트마다 한 번 읽어 허용 여부를 확인하고, Crawl-delay를 반영합니다."""
+        if not self.respect_robots:
+            return True
+        host = self._host(url)
+        with host.robots_lock:
+            if host.robots is None:
+                parts = urlsplit(url)
+                robots = RobotFileParser()
+                try:
+                    response = self._http_get(f"{parts.scheme}://{parts.netloc}/robots.txt")
+                    if response.status_code in (401, 403):
+                        robots.disallow_all = True
+                    elif response.status_code == 200:
+                        robots.parse(response.text.splitlines())
+                    else:
+                        robots.allow_all = True
+                except RunAborted:
+                    raise
+                except Exception:
+                    robots.allow_all = True
+                delay = robots.crawl_delay(USER_AGENT) or robots.crawl_delay("*")
+                if delay:
+                    host.delay = max(host.delay, float(delay))
+                host.robots = robots
+        return host.robots.can_fetch(USER_AGENT, url)
+
+    def _fetch(self, url):
+        """페이지 HTML을 반환합니다. 본문이 거의 없으면 브라우저로 렌더링해서 다시 가져옵니다."""
+        html = None
+        try:
+            response = self._http_get(url)
+            if response.status_code == 200:
+                html = response.text
+        except RunAborted:
+            raise
+        except Exception as e:
+            print(f"CrawlFrontier: requests 실패 ({url}): {e}")
+
+        if html and (len(extract_clean_text(html)) >= MIN_TEXT_CHARS or extract_posting_links(html, url)):
+            return html
+        with self._browser_slots:
+            print(f"CrawlFrontier: 본문이 부족하여 브라우저로 다시 가져옵니다 ({url})")
+            return fetch_rendered_html(url) or html
+
+    def _process(self, url, expand):
+        """URL 하나를 처리하고 (결과 dict, 새로 발견한 공고 URL 목록)을 반환합니다."""
+        canonical = canonicalize_url(url)
+        if not self._allowed(url):
+            return {"url": url, "status": "blocked"}, []
+        html = self._fetch(url)
+        if not html:
+            return {"url": url, "status": "failed"}, []
+
+        if expand and not looks_like_posting(url):
+            links = extract_posting_links(html, url)
+            if len(links) >= MIN_LISTING_LINKS:
+                print(f"CrawlFrontier: 목록 페이지 {url}에서 공고 링크 {len(links)}개를 찾았습니다.")
+                return {"url": url, "status": "listing", "links": len(links)}, links
+
+        text = extract_clean_text(html)
+        name = f"{urlsplit(canonical).hostname}_{hashlib.sha1(canonical.encode()).hexdigest()[:10]}.txt"
+        path = current_run().output_path(f"{POSTINGS_DIR}/{name}")
+        write_posting_file(path, url, text)
+        return {"url": url, "status": "saved", "path": path, "chars": len(text)}, []
+
+    # --- 스케줄링 ---
+
+    def _next_ready(self, now):
+        """호스트 제한과 요청 간격을 만족하는 다음 URL을 큐에서 꺼냅니다. 없으면 None입니다."""
+        for _ in range(len(self._queue)):
+            url, expand = self._queue.popleft()
+            host = self._host(url)
+            if host.in_flight < self.per_host and now >= host.next_start:
+                host.in_flight += 1
+                host.next_start = now + host.delay
+                return url, expand, host
+            self._queue.append((url, expand))
+        return None
+
+    def crawl(self):
+        """
+        큐가 빌 때까지 병렬로 수집하고 결과 목록을 반환합니다.
+        결과: {"url", "status": saved/listing/blocked/failed/error, "path"(saved일 때)}
+        """
+        run = current_run()
+        saved = 0
+        running = {}
+
+        def task(url, expand):
+            with use_run(run):
+                return self._process(url, expand)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while self._queue or running:
+                run.check()
+                while len(running) < self.max_workers and saved + len(running) < self.max_postings:
+                    ready = self._next_ready(time.monotonic())
+                    if ready is None:
+                        break
+                    url, expand, host = ready
+                    running[pool.submit(task, url, expand)] = (url, host)
+
+                if not running:
+                    if saved >= self.max_postings:
+                        break
+                    run.sleep(0.1)   # 모든 호스트가 요청 간격 대기 중
+                    continue
+
+                done, _ = wait(list(running), timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, host = running.pop(future)
+                    host.in_flight -= 1
+                    try:
+                        result, links = future.result()
+                    except RunAborted:
+                        raise
+                    except Exception as e:
+                        result, links = {"url": url, "status": "error", "error": str(e)}, []
+                    self.results.append(result)
+                    if result["status"] == "saved":
+                        saved += 1
+                    for link in links:
+                        self.add(link, expand=False)
+
+        skipped = len(self._queue)
+        if skipped:
+            print(f"CrawlFrontier: 최대 공고 수({self.max_postings}개)에 도달하여 {skipped}개 URL을 건너뜁니다.")
+        print(f"CrawlFrontier: 공고 {saved}개 저장, 전체 {len(self.results)}개 URL 처리")
+        return self.results
+
+
+def crawl_postings(urls, expand_listings=True, **options):
+    """URL 목록(공고 또는 채용 목록 페이지)을 수집하여 저장된 공고의 결과 목록을 반환합니다."""
+    frontier = CrawlFrontier(**options)
+    for url in urls:
+        frontier.add(url, expand=expand_listings)
+    return [result for result in frontier.crawl() if result["status"] == "saved"]
@@ -0,0 +1,122 @@
+"""
+Teacher(LLM) 채점 전에 자기소개서 초안을 로컬에서 빠르게 검사합니다.
+Writer의 항목 구성(4개 소제목, 각 1000자)과 Rules.txt의 KISS 규칙(백화점식 나열 금지)처럼
+기계적으로 확인할 수 있는 규칙만 검사하며, 실패하면 Writer에 돌려줄 구체적인 피드백을 만듭니다.
+"""
+import re
+
+# Writer가 작성해야 하는 항목 (번호, 이름, 소제목 인식용 키워드)
+SECTIONS = [
+    (1, "지원동기", ("지원동기", "지원 동기")),
+    (2, "직무 관련 역량/경험 1", ("역량", "경험")),
+    (3, "직무 관련 역량/경험 2", ("역량", "경험")),
+    (4, "성격의 장단점", ("성격", "장단점")),
+]
+TARGET_CHARS = 1000
+LENGTH_TOLERANCE = 0.4         # 1000자 기준 ±40%를 벗어나면 실패
+MAX_LIST_ITEMS = 3             # 한 항목 안의 목록(불릿/번호) 줄이 이보다 많으면 백화점식 나열로 판단
+MIN_REPEAT_SENTENCE_CHARS = 15
+MAX_PLAIN_HEADING_CHARS = 40   # 마크다운 표시 없는 'N. 제목' 줄은 이보다 짧을 때만 소제목으로 인정
+
+# '## 1. 지원동기', '### **1. 지원동기**', '#### [1] 지원동기', '**1. 지원동기**', '1) 지원동기' 등
+_SECTION_HEADING = re.compile(r"^\s*(#{1,6}\s*(?:\*\*\s*)?|\*\*\s*)?\[?\s*([1-4])\s*(?:[.)]\]?|\])\s*(.*)$")
+_LIST_ITEM = re.compile(r"^\s*(?:[-*•·▪]|\d+[.)])\s+")
+
+
+def _plain_length(text):
+    """마크다운 기호와 연속 공백을 제거한 글자 수(공백 포함)를 셉니다."""
+    text = re.sub(r"[*#|>`]", "", text)
+    return len(re.sub(r"\s+", " ", text).strip())
+
+
+def _heading(line, expected, style):
+    """line이 expected번 소제목이면 (형식, 소제목)을, 아니면 None을 반환합니다."""
+    match = _SECTION_HEADING.match(line)
+    if not match or int(match.group(2)) != expected:
+        return None
+    # '### **1. ...**'과 '### 1. ...'은 같은 형식으로 봅니다 ('##', '**', 표시 없음 중 하나).
+    prefix = re.sub(r"\s", "", match.group(1) or "")
+    if prefix.startswith("#"):
+        prefix = prefix.rstrip("*")
+    title = match.group(3).strip().strip("*#[]").strip()
+    if style is not None and prefix != style:
+        return None
+    if not prefix and len(title) > MAX_PLAIN_HEADING_CHARS:
+        return None
+    return prefix, title
+
+
+def split_sections(draft):
+    """
+    '1. 지원동기' 같은 소제목 줄을 기준으로 {번호: (소제목, 본문)}을 반환합니다.
+    다음 차례의 번호이면서 첫 소제목과 같은 형식('##', '**', 표시 없음)인 줄만 소제목으로 인정하므로,
+    본문 안의 번호 목록이나 굵은 글씨 '**3. ...**'가 뒤 항목을 가로채지 않습니다.
+    """
+    sections = {}
+    current = 0
+    style = None
+    for line in draft.splitlines():
+        heading = _heading(line, current + 1, style)
+        if heading:
+            style, title = heading
+            current += 1
+            sections[current] = [title, []]
+            continue
+        if current:
+            sections[current][1].append(line)
+    return {number: (title, "\n".join(body).strip()) for number, (title, body) in sections.items()}
+
+
+def _sentences(text):
+    text = re.sub(r"[*#]", "", text)
+    return [s.strip() for s in re.split(r"(?<=[.!?])\s+|\n+", text) if s.strip()]
+
+
+def lint_cover_letter(draft):
+    """
+    초안을 검사하여 (통과 여부, 문제 목록)을 반환합니다.
+    """
+    issues = []
+    sections = split_sections(draft)
+
+    for number, name, keywords in SECTIONS:
+        if number not in sections:
+            issues.append(f"{number}. {name} 항목의 소제목을 찾을 수 없습니다. '{number}. {name}' 형식의 소제목을 포함하세요.")
+            continue
+        title, body = sections[number]
+        if not any(keyword in title for keyword in keywords):
+            issues.append(f"{number}번 항목의 소제목('{title}')이 '{name}' 항목임을 알 수 없습니다.")
+
+        length = _plain_length(body)
+        low, high = TARGET_CHARS * (1 - LENGTH_TOLERANCE), TARGET_CHARS * (1 + LENGTH_TOLERANCE)
+        if length < low:
+            issues.append(f"{number}. {name}: 본문이 {length}자로 너무 짧습니다. {TARGET_CHARS}자 내외로 구체적인 사례를 보강하세요.")
+        elif length > high:
+            issues.append(f"{number}. {name}: 본문이 {length}자로 너무 깁니다. {TARGET_CHARS}자 내외로 줄이세요.")
+
+        list_items = [line for line in body.splitlines() if _LIST_ITEM.match(line)]
+        if len(list_items) > MAX_LIST_ITEMS:
+            issues.append(
+                f"{number}. {name}: 목록 형태로 {len(list_items)}개를 나열했습니다. "
+                "백화점식 나열 대신 하나의 사례를 구체적으로 서술하세요 (KISS)."
+            )
+
+    seen, repeated = set(), []
+    for sentence in _sentences(draft):
+        key = re.sub(r"\s+", "", sentence)
+        if len(key) < MIN_REPEAT_SENTENCE_CHARS:
+            continue
+        if key in seen and sentence not in repeated:
+            repeated.append(sentence)
+        seen.add(key)
+    for sentence in repeated:
+        issues.append(f"같은 문장이 반복됩니다: \"{sentence[:60]}\"")
+
+    return not issues, issues
+
+
+def format_feedback(issues):
+    """Writer가 다음 시도에서 참고할 피드백 문서를 만듭니다."""
+    lines = ["[자동 규칙 검사 결과: 불합격]", "아래 형식 규칙을 지키지 않아 채점 전에 반려되었습니다. 모두 수정하세요."]
+    lines += [f"- {issue}" for issue in issues]
+    return "\n".join(lines)
@@ -0,0 +1,223 @@
+"""
+모든 에이전트가 공통으로 사용하는 Gemini API 호출 모듈입니다.
+요청마다 connect/read 타임아웃을 적용하고, 현재 실행(RunContext)의 마감 시간과 취소 요청을 따릅니다.
+단계별 모델 대체 체인, 헤지 요청, 서킷 브레이커는 ModelRouter의 상태를 사용하고,
+API 키는 요청마다 KeyPool에서 가장 여유 있는 키를 골라 사용합니다.
+"""
+import json
+import time
+import queue
+import threading
+
+from RunContext import current_run, RunAborted
+from ModelRouter import get_model_chain, breaker, latency, hedge_delay
+from KeyPool import key_pool, CHARS_PER_TOKEN
+
+API_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={key}"
+MAX_RETRIES = 5
+
+
+def send_request(url, payload, run, method="POST"):
+    """
+    별도 스레드에서 HTTP 요청을 보내고, 호출 스레드는 완료 또는 취소를 기다립니다.
+    취소되면 세션을 닫고 응답을 기다리지 않고 바로 RunAborted를 발생시킵니다.
+    """
+    import requests
+
+    session = requests.Session()
+    token = run.register(session.close)
+    done = threading.Event()
+    outcome = {}
+
+    def send():
+        try:
+            outcome["response"] = session.request(method, url, json=payload, timeout=run.request_timeout())
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    threading.Thread(target=send, daemon=True).start()
+    try:
+        run.wait(done)
+    finally:
+        run.unregister(token)
+        if done.is_set():
+            session.close()
+
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["response"]
+
+
+def inline_payload(static_prefix, payload):
+    """캐시를 쓰지 않을 때: 고정 앞부분을 사용자 프롬프트 앞에 그대로 붙인 요청을 만듭니다."""
+    text = payload["contents"][0]["parts"][0]["text"]
+    request = dict(payload)
+    request["contents"] = [{"role": "user", "parts": [{"text": static_prefix + "\n\n" + text}]}]
+    return request
+
+
+def _build_request(model, api_key, payload, static_prefix, run):
+    """static_prefix가 있으면 실행의 프롬프트 캐시를 사용하고, 캐시가 없으면 프롬프트에 그대로 붙입니다."""
+    if static_prefix is None:
+        return payload
+    if run.prompt_cache is not None:
+        return run.prompt_cache.build_payload(model, api_key, static_prefix, payload, run)
+    return inline_payload(static_prefix, payload)
+
+
+def _attempt(model, payload, run, static_prefix=None, stage=None):
+    """
+    모델 하나에 요청을 한 번 보냅니다. 키 풀에서 키를 하나 빌려 사용하고 결과를 키별 사용량에 기록합니다.
+    반환값: ("ok", 텍스트) / ("retry", None): 429·5xx·네트워크 오류 / ("fatal", None): 그 외 오류
+            ("cancelled", None): 헤지 경쟁에서 져서 취소됨
+    """
+    pool = key_pool()
+    circuit = breaker(model)
+    estimated_tokens = (len(json.dumps(payload, ensure_ascii=False)) + len(static_prefix or "")) // CHARS_PER_TOKEN
+    lease = None
+    try:
+        lease = pool.acquire(model, run, estimated_tokens)
+        started = time.monotonic()
+        request = _build_request(model, lease.key, payload, static_prefix, run)
+        run.add_api_call()
+        response = send_request(API_URL.format(model=model, key=lease.key), request, run)
+    except RunAborted:
+        if lease:
+            pool.release(lease, "cancelled")
+        circuit.record_cancelled()
+        return "cancelled", None
+    except Exception as e:
+        print(f"네트워크 오류 ({model}): {e}")
+        if lease:
+            pool.release(lease, "error")
+        circuit.record_failure()
+        return "retry", None
+
+    if response.status_code == 200:
+        latency(stage, model).add(time.monotonic() - started)
+        circuit.record_success()
+        result = response.json()
+        pool.release(lease, "ok", result.get("usageMetadata", {}).get("totalTokenCount"))
+        return "ok", result.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', "")
+    if response.status_code == 429:
+        # 429는 모델 장애가 아니라 키의 할당량 문제이므로 서킷 대신 해당 키만 잠시 쉬게 합니다.
+        pool.release(lease, "throttled")
+        circuit.record_cancelled()
+        return "retry", None
+    pool.release(lease, "error")
+    if response.status_code >= 500:
+        print(f"API 호출 지연/실패 ({model}, Status {response.status_code})")
+        circuit.record_failure()
+        return "retry", None
+
+    circuit.record_cancelled()
+    print(f"API 호출 에러 ({model}, 키 {lease.api_key.label}, Status {response.status_code}): {response.text}")
+    # API 키가 유효하지 않다는 메시지가 있으면 즉시 중단
+    if "API key not valid" in response.text:
+        print("팁: API_KEY.txt 파일에 오타나 불필요한 공백, 따옴표가 없는지 확인하세요.")
+    return "fatal", None
+
+
+def _hedged_call(models, payload, run, static_prefix=None, stage=None):
+    """
+    models[0]에 먼저 요청하고,
+    - 실패하면 다음 모델로 바로 대체(fallback) 요청을 보내고
+    - 관측된 p95 응답 시간이 지나도 응답이 없으면 다음 모델로 헤지 요청을 동시에 보내
+    가장 먼저 성공한 응답을 사용합니다. 나머지 요청은 즉시 취소합니다.
+    """
+    results = queue.Queue()
+    children = []
+    launched = []
+
+    def launch():
+        model = models[len(launched)]
+        child = run.child()
+        children.append(child)
+        launched.append(model)
+        threading.Thread(
+            target=lambda: results.put((model,) + _attempt(model, payload, child, static_prefix, stage)),
+            daemon=True,
+        ).start()
+
+    launch()
+    delay = hedge_delay(stage, models[0]) if len(models) > 1 else None
+    hedge_at = time.monotonic() + delay if delay is not None else None
+    running = 1
+    outcome = "fatal"
+
+    try:
+        while running:
+            try:
+                model, status, text = results.get(timeout=0.1)
+            except queue.Empty:
+                run.check()
+                if hedge_at is not None and time.monotonic() >= hedge_at and len(launched) < len(models):
+                    print(f"헤지 요청: {models[0]} 응답이 p95({delay:.1f}초)를 넘겨 {models[len(launched)]}에도 요청합니다.")
+                    launch()
+                    running += 1
+                    hedge_at = None
+                continue
+
+            running -= 1
+            if status == "ok":
+                return "ok", text
+            if status == "retry":
+                outcome = "retry"
+            if len(launched) < len(models):
+                print(f"모델 대체: {model} 실패 -> {models[len(launched)]}")
+                launch()
+                running += 1
+        run.check()
+        return outcome, None
+    finally:
+        for child in children:
+            child.cancel()
+            child.detach()
+        # allow()로 시험 요청 자리를 잡았지만 실제로 보내지 않은 모델은 자리를 돌려줍니다.
+        for model in models[len(launched):]:
+            breaker(model).record_cancelled()
+
+
+def generate_content(payload, model_name=None, stage=None, static_prefix=None):
+    """
+    generateContent API를 호출하여 응답 텍스트를 반환합니다. 실패하면 None을 반환합니다.
+    static_prefix: 재시도마다 바뀌지 않는 프롬프트 앞부분(분석 데이터, 작성 규칙 등).
+    실행에 프롬프트 캐시가 있으면 한 번만 업로드한 캐시를 재사용하고, 없으면 프롬프트 앞에 붙여 보냅니다.
+    stage를 주면 MODEL_CHAIN.txt의 단계별 대체 체인을 사용하고,
+    model_name을 주면 해당 모델 하나만 사용합니다.
+    서킷이 열린(연속 5xx/네트워크 오류) 모델은 건너뛰고, 429를 받은 키는 cool-down 동안 다른 키로 대신합니다.
+    실행이 취소되거나 마감 시간을 넘기면 RunAborted 예외가 그대로 전달됩니다.
+    """
+    pool = key_pool()
+
+    if not pool.keys:
+        print("오류: API 키가 비어 있습니다. API_KEY.txt 내용을 확인하세요.")
+        return None
+
+    chain = [model_name] if model_name else get_model_chain(stage, pool.default_model)
+    if not chain:
+        print("오류: 모델명이 비어 있습니다. API_KEY.txt의 두 번째 항목을 확인하세요.")
+        return None
+
+    run = current_run()
+
+    for i in range(MAX_RETRIES):
+        # 모든 키가 cool-down/한도 초과인 모델은 뒤로 미루고, 바로 보낼 수 있는 모델부터 시도합니다.
+        ordered = sorted(chain, key=lambda m: not pool.is_available(m))
+        models = [m for m in ordered if breaker(m).allow()]
+        if not models:
+            # 모든 모델이 차단된 상태면 백오프 후 다시 확인합니다.
+            print("모든 모델의 서킷이 열려 있어 잠시 대기합니다.")
+            run.sleep(2**i)
+            continue
+
+        status, text = _hedged_call(models, payload, run, static_prefix, stage)
+        if status == "ok":
+            return text
+        if status == "fatal":
+            break
+        # 할당량 초과/서버 오류 시 지수 백오프 적용
+        run.sleep(2**i)
+    return None
@@ -0,0 +1,353 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+from contextlib import closing
+
+DEFAULT_DB_PATH = os.path.join("res", "job_queue.db")
+# 취소 요청을 확인하는 주기 (초)
+CANCEL_POLL_INTERVAL = 1
+# output_dir 없이 공유 res 폴더에 결과를 쓰는 작업 종류 (main.py의 GUI 작업 포함).
+# 이 작업들은 같은 파일을 덮어쓰므로 프로세스/스레드와 관계없이 한 번에 하나만 lease합니다.
+SHARED_OUTPUT_KINDS = ("analysis", "writing", "gui_analysis", "gui_writing")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_until REAL,
+    last_error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, priority DESC, id);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    job_id INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job_id, stage)
+);
+"""
+
+
+def _shared_output(table):
+    """table의 작업이 공유 res 폴더에 결과를 쓰는 작업인지 확인하는 SQL 조건입니다."""
+    kinds = ",".join(f"'{kind}'" for kind in SHARED_OUTPUT_KINDS)
+    return f"({table}.kind IN ({kinds}) AND COALESCE(json_extract({table}.payload, '$.output_dir'), '') = '')"
+
+
+def default_owner():
+    """현재 프로세스를 식별하는 lease 소유자 이름을 만듭니다."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owned(owner):
+    """
+    owner를 주면 그 owner가 아직 lease하고 있는 작업만 갱신하도록 WHERE 조건과 파라미터를 반환합니다.
+    lease를 잃은 워커가 다른 워커가 다시 가져간 작업의 상태를 덮어쓰지 않도록 합니다.
+    """
+    if owner is None:
+        return "", []
+    return " AND status = 'leased' AND lease_owner = ?", [owner]
+
+
+class JobQueue:
+    """
+    SQLite 기반의 영속 작업 큐입니다.
+    우선순위(priority)가 높은 작업부터 lease 방식으로 꺼내며,
+    lease가 만료된 작업(프로세스가 죽은 경우)은 다른 워커가 다시 가져갈 수 있습니다.
+    각 작업은 단계별 체크포인트를 저장하여 재시작 시 이어서 진행합니다.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, lease_seconds=300, retry_base_delay=30):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.retry_base_delay = retry_base_delay
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # 이전 버전에서 만든 DB에는 cancel_requested 컬럼이 없으므로 추가합니다.
+            columns = [row["name"] for row in conn.execute("PRAGMA table_info(jobs)")]
+            if "cancel_requested" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return closing(conn)
+
+    def enqueue(self, kind, payload=None, priority=0, max_attempts=3):
+        """작업을 큐에 추가하고 작업 ID를 반환합니다."""
+        now = time.time()
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO jobs (kind, payload, priority, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload or {}, ensure_ascii=False, sort_keys=True), priority, max_attempts, now, now, now),
+            )
+            return cur.lastrowid
+
+    def lease(self, owner=None, kinds=None, job_id=None):
+        """
+        실행 가능한 작업 하나를 lease하여 dict로 반환합니다. 없으면 None을 반환합니다.
+        - 대기 중(queued)이면서 재시도 대기 시간이 지난 작업
+        - lease가 만료된 작업 (이전 워커가 비정상 종료된 경우)
+        - 같은 owner가 이전에 잡고 있던 작업 (같은 owner로 재시작한 경우)
+        공유 res 폴더에 쓰는 작업은 다른 공유 작업이 실행 중(lease 유효)이면 가져가지 않습니다.
+        job_id를 지정하면 재시도 대기 시간과 관계없이 해당 작업을 바로 lease합니다.
+        """
+        owner = owner or default_owner()
+        now = time.time()
+        ready_at = float("inf") if job_id is not None else now
+        query = (
+            "SELECT * FROM jobs WHERE "
+            "((status = 'queued' AND available_at <= ?) "
+            "OR (status = 'leased' AND (lease_until < ? OR lease_owner = ?))) "
+            f"AND NOT ({_shared_output('jobs')} AND EXISTS (SELECT 1 FROM jobs AS running "
+            f"WHERE running.id != jobs.id AND running.status = 'leased' AND running.lease_until >= ? "
+            f"AND {_shared_output('running')}))"
+        )
+        params = [ready_at, now, owner, now]
+        if kinds:
+            query += f" AND kind IN ({','.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        if job_id is not None:
+            query += " AND id = ?"
+            params.append(job_id)
+        query += " ORDER BY priority DESC, id LIMIT 1"
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(query, params).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_until = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (owner, now + self.lease_seconds, now, row["id"]),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["attempts"] += 1
+        job["lease_owner"] = owner
+        return job
+
+    def heartbeat(self, job_id, owner=None):
+        """실행 중인 작업의 lease를 연장합니다. lease를 잃었으면 False를 반환합니다."""
+        owner = owner or default_owner()
+        now = time.time()
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (now + self.lease_seconds, now, job_id, owner),
+            )
+            return cur.rowcount == 1
+
+    def complete(self, job_id, owner=None):
+        """작업을 완료 처리합니다. owner를 주면 그 owner의 lease일 때만 갱신하고, 아니면 False를 반환합니다."""
+        now = time.time()
+        where, params = _owned(owner)
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'done', lease_owner = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE id = ?" + where,
+                [now, job_id] + params,
+            )
+            return cur.rowcount == 1
+
+    def fail(self, job_id, error="", owner=None):
+        """
+        작업 실패를 기록합니다. 재시도 횟수가 남아 있으면 지수 백오프 후 다시 대기열에 넣고,
+        모두 소진했으면 failed 상태로 둡니다. 최종 상태 문자열을 반환합니다.
+        작업이 없거나 owner의 lease가 아니면 None을 반환합니다.
+        """
+        now = time.time()
+        where, params = _owned(owner)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT attempts, max_attempts FROM jobs WHERE id = ?" + where, [job_id] + params
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                if row["attempts"] < row["max_attempts"]:
+                    status = "queued"
+                    available_at = now + self.retry_base_delay * (2 ** (row["attempts"] - 1))
+                else:
+                    status = "failed"
+                    available_at = now
+                conn.execute(
+                    "UPDATE jobs SET status = ?, available_at = ?, lease_owner = NULL, lease_until = NULL, "
+                    "last_error = ?, updated_at = ? WHERE id = ?",
+                    (status, available_at, str(error), now, job_id),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return status
+
+    def request_cancel(self, job_id):
+        """
+        작업 취소를 요청합니다. 대기 중인 작업은 바로 cancelled가 되고,
+        실행 중인 작업은 워커가 취소 플래그를 보고 진행 중인 요청을 중단합니다.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', updated_at = ? WHERE id = ? AND status = 'queued'",
+                (now, job_id),
+            )
+            conn.execute(
+                "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND status = 'leased'",
+                (now, job_id),
+            )
+
+    def is_cancel_requested(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def mark_cancelled(self, job_id, reason="", owner=None):
+        """실행 중 취소된 작업을 재시도 없이 cancelled 상태로 둡니다. owner의 lease가 아니면 False를 반환합니다."""
+        now = time.time()
+        where, params = _owned(owner)
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', lease_owner = NULL, lease_until = NULL, "
+                "last_error = ?, updated_at = ? WHERE id = ?" + where,
+                [str(reason), now, job_id] + params,
+            )
+            return cur.rowcount == 1
+
+    def release(self, job_id, reason="", owner=None):
+        """
+        사용자가 중지했거나 실패한 GUI 작업을 시도 횟수를 늘리지 않고 다시 대기 상태로 돌립니다.
+        체크포인트는 그대로 남으므로 다음에 같은 입력으로 lease하면 이어서 진행합니다.
+        owner의 lease가 아니면 False를 반환합니다.
+        """
+        now = time.time()
+        where, params = _owned(owner)
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), available_at = ?, "
+                "lease_owner = NULL, lease_until = NULL, last_error = ?, updated_at = ? WHERE id = ?" + where,
+                [now, str(reason), now, job_id] + params,
+            )
+            return cur.rowcount == 1
+
+    def get(self, job_id):
+        """작업 정보를 dict로 반환합니다."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+    def find_unfinished(self, kind, payload=None):
+        """
+        아직 끝나지 않은(queued/leased) 가장 오래된 작업 ID를 반환합니다.
+        payload를 주면 입력이 같은 작업만 찾습니다.
+        """
+        query = "SELECT id FROM jobs WHERE kind = ? AND status IN ('queued', 'leased')"
+        params = [kind]
+        if payload is not None:
+            query += " AND payload = ?"
+            params.append(json.dumps(payload, ensure_ascii=False, sort_keys=True))
+        with self._connect() as conn:
+            row = conn.execute(query + " ORDER BY id LIMIT 1", params).fetchone()
+        return row["id"] if row else None
+
+    def save_checkpoint(self, job_id, stage, data, owner=None):
+        """
+        단계별 체크포인트를 저장(덮어쓰기)합니다.
+        owner를 주면 그 owner가 아직 lease하고 있을 때만 저장하고, 아니면 False를 반환합니다.
+        """
+        values = [job_id, stage, json.dumps(data, ensure_ascii=False), time.time()]
+        with self._connect() as conn:
+            if owner is None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints (job_id, stage, data, updated_at) VALUES (?, ?, ?, ?)", values
+                )
+                return True
+            cur = conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (job_id, stage, data, updated_at) SELECT ?, ?, ?, ? "
+                "WHERE EXISTS (SELECT 1 FROM jobs WHERE id = ? AND status = 'leased' AND lease_owner = ?)",
+                values + [job_id, owner],
+            )
+            return cur.rowcount == 1
+
+    def load_checkpoint(self, job_id, stage):
+        """저장된 체크포인트를 반환합니다. 없으면 None을 반환합니다."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT data FROM checkpoints WHERE job_id = ? AND stage = ?", (job_id, stage)
+            ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+
+def heartbeat_loop(queue, job_id, owner, run, stop_event):
+    """
+    작업이 실행되는 동안 lease가 만료되지 않도록 주기적으로 연장하고,
+    취소 요청이 들어오거나 lease를 잃으면 run을 취소해 실행 중인 요청을 즉시 중단합니다.
+    stop_event가 설정될 때까지 실행되며, 별도 스레드에서 실행합니다.
+    """
+    interval = max(queue.lease_seconds / 3, 1)
+    last_heartbeat = time.monotonic()
+    while not stop_event.wait(CANCEL_POLL_INTERVAL):
+        if queue.is_cancel_requested(job_id):
+            print(f"작업 큐: 작업 {job_id} 취소 요청을 받았습니다.")
+            run.cancel()
+            return
+        if time.monotonic() - last_heartbeat >= interval:
+            last_heartbeat = time.monotonic()
+            if not queue.heartbeat(job_id, owner):
+                print(f"작업 큐: 작업 {job_id}의 lease를 잃었습니다.")
+                run.cancel()
+                return
+
+
+class JobCheckpoint:
+    """
+    Pipeline에 넘겨주는 작업 단위 체크포인트 핸들입니다.
+    owner를 주면 lease를 잃은 뒤에는 다른 워커의 체크포인트를 덮어쓰지 않습니다.
+    """
+
+    def __init__(self, queue, job_id, owner=None):
+        self.queue = queue
+        self.job_id = job_id
+        self.owner = owner
+
+    def load(self, stage):
+        return self.queue.load_checkpoint(self.job_id, stage)
+
+    def save(self, stage, data):
+        if not self.queue.save_checkpoint(self.job_id, stage, data, self.owner):
+            print(f"작업 큐: 작업 {self.job_id}의 lease를 잃어 '{stage}' 체크포인트를 저장하지 않았습니다.")
+            return False
+        return True
+
@@ -0,0 +1,247 @@
+"""
+여러 개의 Gemini API 키를 나누어 사용하는 키 풀입니다.
+키마다 분당 요청 수(RPM)/토큰 수(TPM) 한도, 429 이후 대기(cool-down), 사용량을 따로 관리하고,
+요청마다 가장 여유 있는 키를 골라 배치 작업의 처리량이 키 개수만큼 늘어나도록 합니다.
+
+API_KEY.txt 형식: 한 줄에 키 하나 "API_KEY[,MODEL_NAME[,RPM[,TPM]]]"
+    AIza...1,gemini-2.5-flash,10,250000
+    AIza...2,,10,250000
+기본 모델은 모델이 적힌 첫 줄의 모델입니다. RPM/TPM을 비우면 한도 없이 사용합니다.
+"""
+import os
+import json
+import time
+import threading
+from collections import deque
+
+API_KEY_FILE = "API_KEY.txt"
+USAGE_REPORT_PATH = os.path.join("res", "key_usage.json")
+
+WINDOW_SECONDS = 60
+# 429를 받은 키는 해당 모델에 대해 잠시 쉬게 합니다. 연속으로 받으면 대기 시간을 두 배로 늘립니다.
+COOLDOWN_BASE_SECONDS = 15
+COOLDOWN_MAX_SECONDS = 300
+# 응답의 usageMetadata를 받기 전까지 요청 토큰 수를 글자 수로 추정합니다.
+CHARS_PER_TOKEN = 2
+ACQUIRE_POLL_SECONDS = 0.5
+
+_lock = threading.Lock()
+_report_lock = threading.Lock()   # 워커 스레드들이 작업을 끝낼 때마다 같은 리포트 파일을 씁니다.
+_pool = None
+_pool_mtime = None
+
+
+def _clean(value):
+    return value.replace('"', '').replace("'", "").strip()
+
+
+def _limit(value):
+    value = _clean(value)
+    return int(value) if value.isdigit() and int(value) > 0 else None
+
+
+def load_api_keys(path=API_KEY_FILE):
+    """API_KEY.txt를 읽어 [(키, 모델, RPM, TPM), ...]을 반환합니다."""
+    entries = []
+    if not os.path.exists(path):
+        return entries
+    try:
+        # utf-8-sig는 윈도우 메모장 등에서 붙는 BOM 문자를 자동으로 제거합니다.
+        with open(path, "r", encoding="utf-8-sig") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                parts = [p.strip() for p in line.split(",")] + ["", "", ""]
+                key = _clean(parts[0])
+                if key:
+                    entries.append((key, _clean(parts[1]), _limit(parts[2]), _limit(parts[3])))
+    except Exception as e:
+        print(f"API 설정 파일을 읽는 중 오류 발생: {e}")
+    return entries
+
+
+class ApiKey:
+    """키 하나의 한도, 최근 1분 사용량, 모델별 cool-down, 누적 사용량입니다."""
+
+    def __init__(self, key, rpm=None, tpm=None):
+        self.key = key
+        self.rpm = rpm
+        self.tpm = tpm
+        self.in_flight = 0
+        self.window = deque()        # [시각, 토큰 수] (최근 WINDOW_SECONDS)
+        self.cooldown_until = {}     # 모델 -> 시각
+        self.throttle_streak = {}    # 모델 -> 연속 429 횟수
+        self.requests = 0
+        self.successes = 0
+        self.throttled = 0
+        self.errors = 0
+        self.tokens = 0
+
+    @property
+    def label(self):
+        """로그/리포트용으로 키 끝 4자리만 보여 줍니다."""
+        return f"...{self.key[-4:]}"
+
+    def _trim(self, now):
+        while self.window and now - self.window[0][0] >= WINDOW_SECONDS:
+            self.window.popleft()
+
+    def ready_in(self, model, estimated_tokens, now):
+        """이 키로 model에 요청하려면 기다려야 하는 시간(초)을 반환합니다. 0이면 바로 사용할 수 있습니다."""
+        self._trim(now)
+        wait = max(self.cooldown_until.get(model, 0) - now, 0)
+        if self.rpm and len(self.window) >= self.rpm:
+            wait = max(wait, self.window[0][0] + WINDOW_SECONDS - now)
+        if self.tpm and self.window:
+            used = sum(entry[1] for entry in self.window)
+            if used + estimated_tokens > self.tpm:
+                wait = max(wait, self.window[0][0] + WINDOW_SECONDS - now)
+        return wait
+
+    def load(self):
+        """동시 요청 수, 한도 대비 최근 사용률 순으로 비교할 부하 값입니다."""
+        utilization = 0.0
+        if self.rpm:
+            utilization = max(utilization, len(self.window) / self.rpm)
+        if self.tpm:
+            utilization = max(utilization, sum(entry[1] for entry in self.window) / self.tpm)
+        return self.in_flight, utilization, self.requests
+
+
+class KeyLease:
+    def __init__(self, api_key, model, entry):
+        self.api_key = api_key
+        self.model = model
+        self.entry = entry
+
+    @property
+    def key(self):
+        return self.api_key.key
+
+
+class KeyPool:
+    def __init__(self, entries):
+        self._lock = threading.Lock()
+        self.keys = [ApiKey(key, rpm, tpm) for key, _, rpm, tpm in entries]
+        self.default_model = next((model for _, model, _, _ in entries if model), "")
+
+    def _pick(self, model, estimated_tokens):
+        """(바로 쓸 수 있는 가장 한가한 키, 가장 빨리 사용 가능해지는 대기 시간)을 반환합니다."""
+        now = time.monotonic()
+        ready, soonest = [], None
+        for api_key in self.keys:
+            wait = api_key.ready_in(model, estimated_tokens, now)
+            if wait <= 0:
+                ready.append(api_key)
+            elif soonest is None or wait < soonest:
+                soonest = wait
+        if ready:
+            return min(ready, key=ApiKey.load), 0
+        return None, soonest
+
+    def is_available(self, model):
+        """model에 지금 바로 요청할 수 있는 키가 있는지 반환합니다."""
+        with self._lock:
+            return self._pick(model, 0)[0] is not None
+
+    def acquire(self, model, run, estimated_tokens=0):
+        """
+        model에 사용할 키를 골라 lease를 반환합니다.
+        모든 키가 한도에 걸렸거나 cool-down 중이면 사용 가능해질 때까지 기다립니다 (취소/마감 시 예외).
+        """
+        while True:
+            with self._lock:
+                api_key, wait = self._pick(model, estimated_tokens)
+                if api_key is not None:
+                    entry = [time.monotonic(), estimated_tokens]
+                    api_key.window.append(entry)
+                    api_key.in_flight += 1
+                    api_key.requests += 1
+                    return KeyLease(api_key, model, entry)
+            run.sleep(min(wait, ACQUIRE_POLL_SECONDS) if wait else ACQUIRE_POLL_SECONDS)
+
+    def release(self, lease, status, tokens=None):
+        """
+        요청 결과를 기록합니다.
+        status: "ok" / "throttled"(429) / "error" / "cancelled"
+        tokens: 응답의 usageMetadata.totalTokenCount (있으면 추정치를 대체)
+        """
+        with self._lock:
+            api_key = lease.api_key
+            api_key.in_flight -= 1
+            if tokens is not None:
+                lease.entry[1] = tokens
+            if status == "ok":
+                api_key.successes += 1
+                api_key.tokens += lease.entry[1]
+                api_key.throttle_streak.pop(lease.model, None)
+            elif status == "throttled":
+                api_key.throttled += 1
+                streak = api_key.throttle_streak.get(lease.model, 0) + 1
+                api_key.throttle_streak[lease.model] = streak
+                cooldown = min(COOLDOWN_BASE_SECONDS * 2 ** (streak - 1), COOLDOWN_MAX_SECONDS)
+                api_key.cooldown_until[lease.model] = time.monotonic() + cooldown
+                print(f"키 {api_key.label}: {lease.model} 할당량 초과(429), {cooldown}초 동안 다른 키를 사용합니다.")
+            elif status == "error":
+                api_key.errors += 1
+
+    def usage(self):
+        """키별 누적 사용량을 반환합니다."""
+        now = time.monotonic()
+        with self._lock:
+            report = []
+            for api_key in self.keys:
+                api_key._trim(now)
+                report.append({
+                    "key": api_key.label,
+                    "rpm_limit": api_key.rpm,
+                    "tpm_limit": api_key.tpm,
+                    "requests": api_key.requests,
+                    "successes": api_key.successes,
+                    "throttled": api_key.throttled,
+                    "errors": api_key.errors,
+                    "tokens": api_key.tokens,
+                    "in_flight": api_key.in_flight,
+                    "requests_last_minute": len(api_key.window),
+                    "cooling_down": sorted(m for m, until in api_key.cooldown_until.items() if until > now),
+                })
+            return report
+
+    def save_usage_report(self, path=USAGE_REPORT_PATH):
+        """
+        키별 사용량을 JSON 파일로 저장합니다.
+        임시 파일에 쓴 뒤 교체하므로, 다른 프로세스(GUI/워커)가 동시에 저장해도 반쯤 쓰인 파일이 남지 않습니다.
+        """
+        try:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with _report_lock:
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.usage(), f, ensure_ascii=False, indent=2)
+                os.replace(temp_path, path)
+        except Exception as e:
+            print(f"키 사용량 리포트 저장 실패: {e}")
+
+
+def key_pool(path=API_KEY_FILE):
+    """
+    API_KEY.txt의 키 풀을 반환합니다.
+    파일이 바뀌면 다시 읽으며, 이미 사용 중이던 키의 사용량/cool-down 상태는 유지합니다.
+    """
+    global _pool, _pool_mtime
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    with _lock:
+        if _pool is None or mtime != _pool_mtime:
+            new_pool = KeyPool(load_api_keys(path))
+            if _pool is not None:
+                previous = {api_key.key: api_key for api_key in _pool.keys}
+                for i, api_key in enumerate(new_pool.keys):
+                    if api_key.key in previous:
+                        old = previous[api_key.key]
+                        old.rpm, old.tpm = api_key.rpm, api_key.tpm
+                        new_pool.keys[i] = old
+            _pool, _pool_mtime = new_pool, mtime
+        return _pool
@@ -0,0 +1,136 @@
+"""
+단계(stage)별 모델 대체 체인, (단계, 모델)별 응답 시간 통계, 모델별 서킷 브레이커를 관리합니다.
+
+MODEL_CHAIN.txt (선택 사항) 형식: 한 줄에 "단계=모델1,모델2,..."
+    writer=gemini-2.5-pro,gemini-2.5-flash
+    teacher_score=gemini-2.5-flash-lite,gemini-2.5-flash
+단계 이름: company, applicant, project, writer, teacher, teacher_score
+파일이 없거나 단계가 없으면 API_KEY.txt의 모델 하나만 사용합니다.
+"""
+import os
+import time
+import threading
+from collections import deque
+
+CHAIN_FILE = "MODEL_CHAIN.txt"
+
+# 설정 파일에 없을 때의 기본 체인. None은 API_KEY.txt의 모델을 뜻합니다.
+DEFAULT_CHAINS = {
+    "teacher_score": ["gemini-2.5-flash-lite", None],
+}
+
+# 서킷 브레이커: 연속 실패 횟수가 넘으면 일정 시간 동안 해당 모델을 건너뜁니다.
+FAILURE_THRESHOLD = 3
+OPEN_SECONDS = 60
+
+# 헤지 요청: 관측된 p95 응답 시간을 넘기면 다음 모델로 동시 요청을 보냅니다.
+# 긴 Writer 생성과 짧은 채점 호출은 응답 시간 분포가 달라 (단계, 모델)마다 따로 기록합니다.
+LATENCY_WINDOW = 50
+HEDGE_MIN_SAMPLES = 5
+HEDGE_QUANTILE = 0.95
+
+_lock = threading.Lock()
+_breakers = {}
+_latencies = {}
+
+
+def load_chain_config(path=CHAIN_FILE):
+    """MODEL_CHAIN.txt를 읽어 {단계: [모델, ...]} 형태로 반환합니다."""
+    chains = {}
+    if not os.path.exists(path):
+        return chains
+    try:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#") or "=" not in line:
+                    continue
+                stage, models = line.split("=", 1)
+                models = [m.strip().strip('"').strip("'") for m in models.split(",")]
+                chains[stage.strip()] = [m for m in models if m]
+    except Exception as e:
+        print(f"모델 체인 설정 파일을 읽는 중 오류 발생: {e}")
+    return chains
+
+
+def get_model_chain(stage, default_model):
+    """단계에 사용할 모델 목록(우선순위 순, 중복 제거)을 반환합니다."""
+    chain = load_chain_config().get(stage) or DEFAULT_CHAINS.get(stage) or [None]
+    models = []
+    for model in chain:
+        model = model or default_model
+        if model and model not in models:
+            models.append(model)
+    return models
+
+
+class CircuitBreaker:
+    """
+    closed: 정상 / open: OPEN_SECONDS 동안 요청 차단 / half-open: 시험 요청 1건만 허용
+    """
+
+    def __init__(self):
+        self.failures = 0
+        self.open_until = 0
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.failures < FAILURE_THRESHOLD:
+                return True
+            if time.monotonic() < self.open_until or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.failures >= FAILURE_THRESHOLD:
+                self.open_until = time.monotonic() + OPEN_SECONDS
+
+    def record_cancelled(self):
+        """결과를 보지 못하고 취소된 시험 요청은 실패로 세지 않습니다."""
+        with self._lock:
+            self.trial_in_flight = False
+
+
+class LatencyTracker:
+    """최근 성공 요청의 응답 시간을 모아 분위수를 계산합니다."""
+
+    def __init__(self):
+        self.samples = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def quantile(self, q):
+        with self._lock:
+            if len(self.samples) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def breaker(model):
+    with _lock:
+        return _breakers.setdefault(model, CircuitBreaker())
+
+
+def latency(stage, model):
+    with _lock:
+        return _latencies.setdefault((stage, model), LatencyTracker())
+
+
+def hedge_delay(stage, model):
+    """stage 단계에서 model의 헤지 대기 시간(p95)을 반환합니다. 표본이 부족하면 None입니다."""
+    return latency(stage, model).quantile(HEDGE_QUANTILE)
@@ -0,0 +1,394 @@
+"""
+GUI(main.py)와 헤드리스 워커(Worker.py)가 공통으로 사용하는 분석/작성 파이프라인입니다.
+checkpoint 객체(load/save)를 넘기면 각 단계가 끝날 때마다 결과를 저장하고,
+재시작 시 이미 끝난 단계(= 이미 비용을 지불한 LLM 호출)는 건너뛰고 이어서 진행합니다.
+호출하는 쪽에서 RunContext.use_run()으로 실행 컨텍스트를 지정하면 단계 사이마다 취소/마감을 확인합니다.
+PROFILE=1이면 각 단계의 CPU/메모리 프로파일을 결과 폴더의 profile/에 저장합니다 (Profiler).
+"""
+import os
+import json
+import hashlib
+import threading
+
+from WebCrawling import save_job_posting_to_txt
+from Agent_CompanyAnalyzer import analyze_company_info
+from Agent_ApplicantAnalyzer import analyze_applicant_info
+from Agent_ProjectAnalyzer import analyze_project_info
+from Agent_Writer import write_cover_letter, write_cover_letter_draft, save_cover_letter
+from Agent_Teacher import grade_cover_letter
+from DraftLinter import lint_cover_letter, format_feedback
+from RunContext import current_run, use_run, RunAborted
+from PromptCache import prompt_cache_scope
+from ResultArchive import ResultArchive, INPUT_KINDS
+from Profiler import profile_stage
+
+
+def _notify(on_status, text, color):
+    if on_status:
+        on_status(text, color)
+
+
+def _read_res(filename):
+    path = current_run().output_path(filename)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _write_res(filename, content):
+    with open(current_run().output_path(filename), "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def _archived(func, *args):
+    """결과 아카이브 기록이 실패해도 작성 루프는 계속 진행합니다."""
+    try:
+        return func(*args)
+    except Exception as e:
+        print(f"Pipeline: 결과 아카이브 기록 실패: {e}")
+        return None
+
+
+def _run_stage(checkpoint, stage, output_file, func):
+    """
+    체크포인트가 있으면 저장된 결과 파일을 복원하고 건너뜁니다.
+    없으면 단계를 실행하고 결과 파일 내용을 체크포인트로 저장합니다.
+    """
+    current_run().check()
+    saved = checkpoint.load(stage) if checkpoint else None
+    if saved and saved.get("done"):
+        print(f"Pipeline: '{stage}' 단계는 체크포인트에서 복원합니다.")
+        _write_res(output_file, saved.get("content", ""))
+        return True
+
+    with profile_stage(stage):
+        if not func():
+            return False
+
+    if checkpoint:
+        checkpoint.save(stage, {"done": True, "content": _read_res(output_file) or ""})
+    return True
+
+
+def _use_crawled_posting(posting_path):
+    """CrawlFrontier가 미리 저장한 공고 파일을 job_description.txt로 복사합니다."""
+    if not os.path.exists(posting_path):
+        print(f"Pipeline: 수집된 공고 파일이 없습니다. ({posting_path})")
+        return False
+    with open(posting_path, "r", encoding="utf-8") as f:
+        _write_res("job_description.txt", f.read())
+    return True
+
+
+def run_analysis(url, resume_path="", portfolio_path="", on_status=None, checkpoint=None, posting_path=""):
+    """
+    1단계: 분석 워크플로우 (크롤링 -> 기업 -> 지원자 -> 프로젝트 분석)
+    posting_path(CrawlFrontier로 미리 수집한 공고 파일)가 있으면 브라우저 크롤링을 건너뜁니다.
+    실패 시 예외를 발생시킵니다.
+    """
+    _notify(on_status, "1단계: 웹 크롤링 진행 중...", "blue")
+    if posting_path:
+        crawl = lambda: _use_crawled_posting(posting_path)
+    else:
+        crawl = lambda: save_job_posting_to_txt(url, "job_description.txt")
+    if not _run_stage(checkpoint, "crawl", "job_description.txt", crawl):
+        raise Exception("웹 크롤링에 실패했습니다.")
+
+    _notify(on_status, "2단계: Gemini AI 기업 분석 진행 중...", "purple")
+    if not _run_stage(checkpoint, "company", "Company_data.txt", analyze_company_info):
+        raise Exception("기업 분석에 실패했습니다.")
+
+    if resume_path:
+        _notify(on_status, "3단계: 지원자 역량 분석 진행 중...", "#E67E22")
+        if not _run_stage(checkpoint, "applicant", "Applicant_data.txt",
+                          lambda: analyze_applicant_info(resume_path)):
+            raise Exception("지원자 분석에 실패했습니다.")
+
+    if portfolio_path:
+        _notify(on_status, "4단계: 포트폴리오 프로젝트 분석 진행 중...", "#16A085")
+        if not _run_stage(checkpoint, "project", "Project_data.txt",
+                          lambda: analyze_project_info(portfolio_path)):
+            raise Exception("프로젝트 분석에 실패했습니다.")
+
+    _notify(on_status, "완료: 모든 분석 데이터가 res 폴더에 저장되었습니다.", "green")
+
+
+# 작성 루프 예산: 합격하지 못해도 이 중 하나에 도달하면 최고 점수 초안으로 종료합니다.
+MAX_WRITING_ATTEMPTS = 8       # Writer 시도 횟수
+MAX_WRITING_API_CALLS = 40     # Writer/Teacher가 보낸 API 요청 수 (재시도·헤지 요청 포함)
+PLATEAU_PATIENCE = 3           # 최고 점수가 연속으로 이 횟수만큼 갱신되지 않으면 중단
+
+SCORE_HISTORY_FILE = "score_history.json"
+
+# 추측 작성: Teacher가 채점표를 만들면 총점이 나오기 전에 다음 시도의 Writer를 미리 시작합니다.
+# 합격하거나 다른 초안에서 다시 작성하게 되면 미리 작성한 초안은 취소되고 그만큼 API 호출이 낭비됩니다.
+SPECULATIVE_WRITING = os.environ.get("SPECULATIVE_WRITING", "").strip().lower() in ("1", "true", "yes")
+
+
+class _SpeculativeDraft:
+    """다음 시도의 초안을 별도 스레드에서 미리 작성합니다. 필요 없어지면 cancel()로 중단합니다."""
+
+    def __init__(self, run, attempt, previous_result, teacher_feedback):
+        self.attempt = attempt
+        self.seed = (previous_result, teacher_feedback)
+        self.draft = None
+        self._run = run.child()
+        self._done = threading.Event()
+        threading.Thread(target=self._write, daemon=True).start()
+
+    def _write(self):
+        try:
+            with use_run(self._run), profile_stage(f"writer_{self.attempt}_speculative"):
+                self.draft = write_cover_letter_draft(self.attempt, *self.seed)
+        except RunAborted:
+            pass
+        except Exception as e:
+            print(f"Pipeline: 시도 {self.attempt} 미리 작성 중 오류: {e}")
+        finally:
+            self._done.set()
+
+    def result(self, run):
+        """미리 작성한 초안이 끝날 때까지 기다려 반환합니다. 실패하면 None입니다."""
+        run.wait(self._done)
+        self._run.detach()
+        return self.draft
+
+    def cancel(self):
+        self._run.cancel()
+        self._run.detach()
+
+
+def _stop_reason(state, max_attempts, max_api_calls, patience):
+    """예산을 다 썼으면 중단 사유를, 아니면 None을 반환합니다."""
+    if state["attempt"] > max_attempts:
+        return f"최대 시도 횟수({max_attempts}회)"
+    if state["api_calls"] >= max_api_calls:
+        return f"API 호출 예산({max_api_calls}회)"
+    if state["best_score"] is not None and state["stale"] >= patience:
+        return f"점수 정체({patience}회 연속 개선 없음)"
+    return None
+
+
+def run_writing_loop(on_status=None, checkpoint=None, max_attempts=MAX_WRITING_ATTEMPTS,
+                     max_api_calls=MAX_WRITING_API_CALLS, patience=PLATEAU_PATIENCE, speculative=None):
+    """
+    2단계: 자기소개서 작성 및 자동 첨삭 루프 (Writer -> Teacher)
+    체크포인트에는 현재 시도 번호, 진행 단계(written/graded), 최신 초안과 피드백,
+    시도별 점수 기록, 지금까지의 최고 점수 초안, Teacher의 채점 항목이 저장됩니다.
+    점수가 떨어졌거나 규칙 검사에서 반려된 시도 다음에는 최고 점수 초안과 그 피드백을 바탕으로 다시 작성합니다.
+    시도 횟수/API 호출 예산을 다 쓰거나 점수가 정체되면 최고 점수 초안을 result.txt에 남기고 종료합니다.
+    speculative=True이면 채점표가 나오는 즉시 다음 시도를 미리 작성해 Writer와 Teacher 시간을 겹칩니다
+    (None이면 SPECULATIVE_WRITING 환경 변수를 따릅니다).
+    반환값: {"passed", "attempt"(실제로 작성한 시도 수), "best_score", "best_attempt", "reason"}
+    """
+    state = (checkpoint.load("writing") if checkpoint else None) or {
+        "attempt": 1,
+        "phase": "pending",
+        "draft": None,
+        "feedback": None,
+        "best_score": None,
+        "best_draft": None,
+        "best_feedback": None,
+        "best_attempt": None,
+    }
+    # 이전 버전 체크포인트에는 아래 항목이 없습니다.
+    state.setdefault("history", [])
+    state.setdefault("best_feedback", None)
+    state.setdefault("stale", 0)
+    state.setdefault("api_calls", 0)
+
+    def summary(passed, reason=None):
+        # 예산 초과로 끝나면 state["attempt"]는 시작하지 않은 다음 시도 번호입니다.
+        return {
+            "passed": passed,
+            "attempt": state["attempt"] if passed else state["attempt"] - 1,
+            "best_score": state["best_score"],
+            "best_attempt": state["best_attempt"],
+            "reason": reason,
+        }
+
+    if state["phase"] == "done":
+        _write_res("result.txt", state["draft"])
+        return summary(True)
+    if state["phase"] == "exhausted":
+        _write_res("result.txt", state["best_draft"] or state["draft"])
+        return summary(False, state.get("reason"))
+
+    # 재시작: 마지막으로 저장된 초안/피드백을 res 폴더에 복원합니다.
+    if state["draft"] is not None:
+        print(f"Pipeline: 작성 루프를 시도 {state['attempt']} ({state['phase']})부터 재개합니다.")
+        _write_res("result.txt", state["draft"])
+    if state["feedback"] is not None:
+        _write_res("teacher_feedback.txt", state["feedback"])
+
+    run = current_run()
+    calls_at_start = run.api_calls
+    calls_before = state["api_calls"]
+
+    # 모든 시도의 초안/채점표를 결과 아카이브에 남깁니다. (재시작하면 같은 아카이브 실행에 이어서 기록)
+    archive = _archived(ResultArchive)
+    if archive and state.get("archive_run_id") is None:
+        inputs = {kind: _read_res(filename) for kind, filename in INPUT_KINDS.items()}
+        state["archive_run_id"] = _archived(archive.start_run, inputs, writing_inputs_fingerprint(), run.output_dir)
+
+    if speculative is None:
+        speculative = SPECULATIVE_WRITING
+    speculation = {}
+
+    def save():
+        state["api_calls"] = calls_before + run.api_calls - calls_at_start
+        if run.prompt_cache is not None:
+            # Teacher의 채점 항목도 저장해, 재시작한 뒤에도 같은 기준으로 best_score/stale과 비교합니다.
+            state["memo"] = run.prompt_cache.remembered()
+        if checkpoint:
+            checkpoint.save("writing", state)
+        _write_res(SCORE_HISTORY_FILE, json.dumps(state["history"], ensure_ascii=False, indent=2))
+
+    def record(attempt, score, verdict):
+        state["history"].append({"attempt": attempt, "score": score, "verdict": verdict})
+        if archive and state.get("archive_run_id"):
+            _archived(archive.add_attempt, state["archive_run_id"], attempt, state["draft"], state["feedback"],
+                      score, verdict)
+        if score is not None and (state["best_score"] is None or score > state["best_score"]):
+            state["best_score"] = score
+            state["best_draft"] = state["draft"]
+            state["best_feedback"] = state["feedback"]
+            state["best_attempt"] = attempt
+            state["stale"] = 0
+        else:
+            state["stale"] += 1
+
+    def reseed_from_best(attempt, why):
+        """최고 점수 초안이 이번 시도가 아니면 그 초안과 피드백에서 다시 출발합니다."""
+        if state["best_attempt"] == attempt or state["best_draft"] is None:
+            return
+        print(f"Pipeline: 시도 {attempt}{why} 시도 {state['best_attempt']} 초안"
+              f"({state['best_score']}점)을 기준으로 다시 작성합니다.")
+        state["draft"] = state["best_draft"]
+        state["feedback"] = state["best_feedback"]
+        _write_res("result.txt", state["draft"])
+        _write_res("teacher_feedback.txt", state["feedback"])
+
+    def finish(passed, reason=None):
+        if archive and state.get("archive_run_id"):
+            _archived(archive.finish_run, state["archive_run_id"], passed, state["best_score"],
+                      state["best_attempt"], reason)
+
+    # 분석 데이터와 작성 규칙처럼 시도마다 같은 프롬프트 앞부분은 루프 동안 한 번만 업로드합니다.
+    # (활성 실행이 없을 때도 에이전트들이 같은 캐시와 API 호출 수를 공유하도록 run을 현재 실행으로 지정합니다.)
+    with use_run(run), prompt_cache_scope(run) as cache:
+        if cache is not None:
+            cache.seed(state.get("memo"))
+        while True:
+            run.check()
+            attempt = state["attempt"]
+
+            if state["phase"] != "written":
+                reason = _stop_reason(state, max_attempts, max_api_calls, patience)
+                if reason:
+                    state["phase"] = "exhausted"
+                    state["reason"] = reason
+                    save()
+                    finish(False, reason)
+                    _write_res("result.txt", state["best_draft"] or state["draft"])
+                    if state["best_feedback"] is not None:
+                        _write_res("teacher_feedback.txt", state["best_feedback"])
+                    print(f"Pipeline: {reason}에 도달하여 작성 루프를 종료합니다. 점수 기록: "
+                          + ", ".join(f"{h['attempt']}:{h['score']}" for h in state["history"]))
+                    _notify(on_status, f"{reason} 도달: 최고 점수 초안(시도 {state['best_attempt']}, "
+                                       f"{state['best_score']}점)을 저장했습니다.", "#E67E22")
+                    return summary(False, reason)
+
+            # 1. Writer 실행 (이미 작성된 초안이 체크포인트에 있으면 건너뜁니다)
+            if state["phase"] != "written":
+                _notify(on_status, f"시도 {attempt}: Writer가 자기소개서를 작성 중입니다...", "#2980B9")
+                with profile_stage(f"writer_{attempt}"):
+                    written = write_cover_letter(attempt)
+                if not written:
+                    raise Exception("자기소개서 작성 중 API 오류가 발생했습니다.")
+                state["draft"] = _read_res("result.txt")
+                state["phase"] = "written"
+                save()
+
+            # 2. 로컬 규칙 검사: 형식이 틀린 초안은 Teacher 채점 없이 바로 되돌려 보냅니다.
+            passed, issues = lint_cover_letter(state["draft"] or "")
+            if not passed:
+                print(f"Pipeline: 시도 {attempt} 초안이 규칙 검사에서 반려되었습니다. ({len(issues)}건)")
+                state["feedback"] = format_feedback(issues)
+                _write_res("teacher_feedback.txt", state["feedback"])
+                record(attempt, None, "lint")
+                reseed_from_best(attempt, " 초안이 반려되어")
+                state["attempt"] = attempt + 1
+                state["phase"] = "graded"
+                save()
+                _notify(on_status, f"규칙 검사 불합격: 채점 없이 다시 작성합니다. (시도 {attempt + 1})", "#E67E22")
+                continue
+
+            # 3. Teacher 실행
+            run.check()
+            _notify(on_status, f"시도 {attempt}: Teacher가 자기소개서를 채점 중입니다...", "#8E44AD")
+
+            def on_feedback(scorecard, attempt=attempt):
+                # 총점을 구하는 동안 다음 시도를 미리 시작합니다 (시도/호출 예산이 남아 있을 때만).
+                if attempt + 1 > max_attempts or calls_before + run.api_calls - calls_at_start >= max_api_calls:
+                    return
+                _notify(on_status, f"시도 {attempt + 1}: 채점표를 받아 다음 초안을 미리 작성합니다...", "#2980B9")
+                speculation["next"] = _SpeculativeDraft(run, attempt + 1, state["draft"], scorecard)
+
+            try:
+                with profile_stage(f"teacher_{attempt}"):
+                    result, score = grade_cover_letter(return_score=True,
+                                                       on_feedback=on_feedback if speculative else None)
+            except BaseException:
+                if "next" in speculation:
+                    speculation.pop("next").cancel()
+                raise
+            pending = speculation.pop("next", None)
+
+            if result != "no" and pending:
+                pending.cancel()
+
+            if result == "error":
+                raise Exception("Teacher 에이전트가 점수를 산출하지 못했습니다. (error)")
+
+            state["feedback"] = _read_res("teacher_feedback.txt")
+            record(attempt, score, result)
+
+            if result == "yes":
+                state["phase"] = "done"
+                save()
+                finish(True)
+                _notify(on_status, "최종 합격: 자기소개서 작성이 완료되었습니다!", "green")
+                return summary(True)
+
+            # 점수가 최고 기록보다 낮으면 최고 점수 초안과 그 피드백에서 다시 출발합니다.
+            reseed_from_best(attempt, f"의 점수({score}점)가 최고 점수보다 낮아")
+
+            state["attempt"] = attempt + 1
+            state["phase"] = "graded"
+            save()
+            _notify(on_status, f"재작성: 점수가 낮아 다시 작성합니다. (시도 {attempt + 1}, {score}점)", "#E67E22")
+
+            # 미리 작성한 초안은 실제로 다시 작성할 기준(초안, 피드백)과 같을 때만 사용합니다.
+            if pending:
+                if pending.seed == (state["draft"], state["feedback"]) and \
+                        _stop_reason(state, max_attempts, max_api_calls, patience) is None:
+                    draft = pending.result(run)
+                    if draft:
+                        print(f"Pipeline: 시도 {attempt + 1}은(는) 채점 중에 미리 작성한 초안을 사용합니다.")
+                        save_cover_letter(attempt + 1, draft)
+                        state["draft"] = draft
+                        state["phase"] = "written"
+                        save()
+                else:
+                    pending.cancel()
+
+
+def writing_inputs_fingerprint():
+    """작성 루프의 입력(분석 결과 파일)이 바뀌었는지 구분하기 위한 해시를 만듭니다."""
+    digest = hashlib.sha256()
+    for filename in ("Company_data.txt", "Applicant_data.txt", "Project_data.txt"):
+        digest.update((_read_res(filename) or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
@@ -0,0 +1,241 @@
+"""
+크롤링한 채용공고의 유사도 인덱스입니다. (shingling + MinHash + LSH)
+같은 공고(거의 동일한 본문)나 같은 기업의 다른 공고를 찾아,
+이전 기업 분석 결과를 재사용할 수 있도록 합니다.
+채용 사이트의 메뉴/추천 공고 목록 때문에 다른 기업의 공고도 비슷해 보일 수 있으므로,
+재사용하기 전에 same_company()로 기업명이 새 공고 머리말에 있는지 확인해야 합니다.
+"""
+import os
+import re
+import json
+import time
+import random
+import sqlite3
+import hashlib
+from contextlib import closing
+
+DEFAULT_DB_PATH = os.path.join("res", "posting_index.db")
+
+SHINGLE_SIZE = 3          # 단어 3-gram
+NUM_PERM = 128            # MinHash 해시 함수 개수
+BANDS = 32                # LSH 밴드 수 (밴드당 4행 -> 유사도 약 0.4 이상이면 후보가 됨)
+ROWS = NUM_PERM // BANDS
+# 새 공고의 앞부분(사이트 제목, 회사명, 공고 제목)에서 기업명을 찾습니다. 추천 공고 목록은 보통 이보다 뒤에 있습니다.
+COMPANY_NAME_SEARCH_CHARS = 1500
+# shingle 방식이 바뀌면 올려서 저장된 시그니처를 다시 계산합니다.
+SIGNATURE_VERSION = 2
+
+# 추정 자카드 유사도 기준
+DUPLICATE_THRESHOLD = 0.9     # 사실상 같은 공고 -> 분석 결과 전체 재사용
+SAME_COMPANY_THRESHOLD = 0.4  # 같은 기업의 다른 공고 -> 기업 공통 부분만 재사용
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS postings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT,
+    content TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    analysis TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    posting_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lsh ON lsh_buckets (band, bucket);
+"""
+
+
+def _normalize_line(line):
+    """비교용으로 한 줄을 정규화합니다. 빈 줄과 크롤러가 붙인 출처 헤더는 None입니다."""
+    line = re.sub(r"\s+", " ", line).strip().lower()
+    if not line or line.startswith("job posting source:") or set(line) == {"="}:
+        return None
+    return line
+
+
+def normalize_lines(text):
+    """공고 본문을 비교용 줄 목록으로 정규화합니다."""
+    return [line for line in map(_normalize_line, text.splitlines()) if line]
+
+
+def shingles(text):
+    words = " ".join(normalize_lines(text)).split()
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(shingle_set):
+    """shingle 집합의 MinHash 시그니처(NUM_PERM개의 정수)를 계산합니다."""
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+              for s in shingle_set]
+    if not hashes:
+        return [_MAX_HASH] * NUM_PERM
+    return [min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def estimate_similarity(sig_a, sig_b):
+    """두 MinHash 시그니처로 자카드 유사도를 추정합니다."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+def _band_buckets(signature):
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        yield band, hashlib.md5(",".join(map(str, rows)).encode()).hexdigest()
+
+
+def posting_delta(new_text, old_text):
+    """이전 공고에 없던 줄(= 이번 공고에만 있는 직무별 내용)만 원래 순서대로 반환합니다."""
+    seen = set(normalize_lines(old_text))
+    kept = []
+    for line in new_text.splitlines():
+        key = _normalize_line(line)
+        if key and key not in seen:
+            seen.add(key)
+            kept.append(line.strip())
+    return "\n".join(kept)
+
+
+def _normalize_company(name):
+    """'(주)시몬스 (Simmons)' -> '시몬스'처럼 법인 표기, 괄호, 공백을 제거합니다."""
+    name = re.sub(r"\([^)]*\)|㈜|주식회사|[\s\[\]]", "", name)
+    return name.lower()
+
+
+def company_name(analysis):
+    """기업 분석 결과의 '1. 기업 명칭/산업' 항목에서 기업명 한 줄을 뽑습니다."""
+    sections = split_analysis_sections(analysis or "")
+    text = sections[1] if sections else (analysis or "")
+    for line in text.splitlines():
+        line = re.sub(r"[*#>`]", "", line).strip(" -:\t")
+        line = re.sub(r"^1\s*\.\s*기업\s*명칭\s*(/\s*산업)?\s*[:：]?\s*", "", line)
+        line = re.sub(r"^(기업\s*명칭|기업명|회사명)\s*[:：]?\s*", "", line)
+        if line:
+            return line[:100]
+    return ""
+
+
+def same_company(analysis, posting_text):
+    """이전 분석의 기업명이 새 공고의 앞부분(출처 헤더 제외)에 나오면 True를 반환합니다."""
+    name = _normalize_company(company_name(analysis))
+    if len(name) < 2:
+        return False
+    head = "".join(normalize_lines(posting_text))[:COMPANY_NAME_SEARCH_CHARS]
+    return name in _normalize_company(head)
+
+
+def _mask_numbers(lines):
+    """마감일(D-14), 날짜, 조회수처럼 숫자만 바뀌는 부분을 지우고, 숫자/기호만 있던 줄은 뺍니다."""
+    masked = (re.sub(r"d-\d+|\d+", "#", line) for line in lines)
+    return {line for line in masked if re.sub(r"[\W_]", "", line)}
+
+
+def is_same_posting(new_text, old_text):
+    """
+    두 공고가 숫자만 바뀐 부분을 빼면 한 줄도 다르지 않으면 True를 반환합니다.
+    유사도는 채용 사이트 공통 문구가 대부분을 차지해 직무 부분(담당업무, 자격요건)만 다른 공고도 높게 나오므로,
+    분석 결과 전체를 재사용하기 전에 이 함수로 확인합니다.
+    """
+    return _mask_numbers(normalize_lines(new_text)) == _mask_numbers(normalize_lines(old_text))
+
+
+_SECTION_PATTERN = re.compile(r"^[\s#*\-]*([1-4])\s*\.\s*\**\s*(기업 명칭|직무명|직무별|기업 핵심)")
+
+
+def split_analysis_sections(analysis):
+    """
+    기업 분석 결과를 '1. 기업 명칭/산업' ~ '4. 기업 핵심가치 & 인재상' 구간으로 나눕니다.
+    네 구간을 모두 찾지 못하면 None을 반환합니다.
+    """
+    sections = {}
+    current = None
+    for line in analysis.splitlines():
+        match = _SECTION_PATTERN.match(line)
+        if match:
+            current = int(match.group(1))
+            sections.setdefault(current, [])
+        if current is not None:
+            sections[current].append(line)
+    if sorted(sections) != [1, 2, 3, 4]:
+        return None
+    return {number: "\n".join(lines).strip() for number, lines in sections.items()}
+
+
+class PostingIndex:
+    """공고 본문과 분석 결과를 저장하고, 새 공고와 가장 비슷한 이전 공고를 찾습니다."""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SIGNATURE_VERSION:
+                self._reindex(conn)
+
+    def _reindex(self, conn):
+        """저장된 공고 본문으로 시그니처와 LSH 버킷을 현재 shingle 방식에 맞게 다시 계산합니다."""
+        conn.execute("DELETE FROM lsh_buckets")
+        for row in conn.execute("SELECT id, content FROM postings").fetchall():
+            signature = minhash(shingles(row["content"]))
+            conn.execute("UPDATE postings SET signature = ? WHERE id = ?", (json.dumps(signature), row["id"]))
+            conn.executemany(
+                "INSERT INTO lsh_buckets (band, bucket, posting_id) VALUES (?, ?, ?)",
+                [(band, bucket, row["id"]) for band, bucket in _band_buckets(signature)],
+            )
+        conn.execute(f"PRAGMA user_version = {SIGNATURE_VERSION}")
+        conn.commit()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return closing(conn)
+
+    def find_similar(self, text):
+        """
+        LSH 후보 중 추정 유사도가 가장 높은 공고를 (공고 dict, 유사도)로 반환합니다.
+        SAME_COMPANY_THRESHOLD 미만이면 (None, 유사도)를 반환합니다.
+        """
+        signature = minhash(shingles(text))
+        with self._connect() as conn:
+            candidate_ids = set()
+            for band, bucket in _band_buckets(signature):
+                rows = conn.execute(
+                    "SELECT posting_id FROM lsh_buckets WHERE band = ? AND bucket = ?", (band, bucket)
+                ).fetchall()
+                candidate_ids.update(row["posting_id"] for row in rows)
+
+            best, best_similarity = None, 0.0
+            for posting_id in candidate_ids:
+                row = conn.execute("SELECT * FROM postings WHERE id = ?", (posting_id,)).fetchone()
+                similarity = estimate_similarity(signature, json.loads(row["signature"]))
+                if similarity > best_similarity:
+                    best, best_similarity = dict(row), similarity
+
+        if best is None or best_similarity < SAME_COMPANY_THRESHOLD:
+            return None, best_similarity
+        return best, best_similarity
+
+    def add(self, text, analysis, source=""):
+        """공고와 분석 결과를 인덱스에 추가합니다."""
+        signature = minhash(shingles(text))
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO postings (source, content, signature, analysis, created_at) VALUES (?, ?, ?, ?, ?)",
+                (source, text, json.dumps(signature), analysis, time.time()),
+            )
+            conn.executemany(
+                "INSERT INTO lsh_buckets (band, bucket, posting_id) VALUES (?, ?, ?)",
+                [(band, bucket, cur.lastrowid) for band, bucket in _band_buckets(signature)],
+            )
+            conn.commit()
+            return cur.lastrowid
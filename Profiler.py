@@ -0,0 +1,249 @@
+"""
+단계별 CPU/메모리 프로파일링입니다.
+실행이 느릴 때 시간이 HTML 파싱, PDF/docx 읽기, base64 인코딩, JSON 직렬화, 네트워크 대기 중 어디에 쓰이는지 확인합니다.
+
+PROFILE=1 환경 변수(또는 main.py / Worker.py의 --profile)로 켜면, Pipeline의 각 단계
+(공고 수집, 기업/지원자/프로젝트 분석, Writer, Teacher)를 실행하는 동안
+- 샘플링 스레드가 sys._current_frames()로 호출 스택을 주기적으로 기록하고 (벽시계 기준이라 네트워크 대기도 보임)
+- tracemalloc으로 최대 메모리 사용량과 할당이 가장 많이 늘어난 코드 줄을 기록합니다.
+
+결과는 결과 폴더의 profile/에 저장됩니다.
+    <시각>_<번호>_<단계>.txt        단계 리포트 (시간, CPU, 많이 보인 함수, 메모리)
+    <시각>_<번호>_<단계>.collapsed  flamegraph.pl / speedscope에서 바로 열 수 있는 collapsed stack
+    all.collapsed                  모든 단계를 합친 collapsed stack (첫 프레임이 단계 이름)
+    summary.jsonl                  단계마다 한 줄씩 요약 (입력 크기별 비교용)
+
+샘플링은 단계를 실행하는 스레드와, 단계 도중 새로 시작된 스레드(HTTP 요청, 헤지 요청 등)를 대상으로 합니다.
+다른 단계와 시간이 겹친 단계(추측 작성 중인 Teacher, 워커의 동시 작업 등)는 어느 단계의 것인지 구분할 수 없는
+최대 메모리와 보조 스레드 샘플을 기록하지 않고 리포트에 '겹침'으로 표시합니다.
+단계별 값이 모두 필요하면 추측 작성을 끄고 워커를 --threads 1로 실행하세요.
+"""
+import os
+import sys
+import json
+import time
+import itertools
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+from RunContext import current_run
+
+PROFILE_DIR = "profile"
+SAMPLE_INTERVAL_SECONDS = 0.01
+MAX_STACK_DEPTH = 64
+TRACEMALLOC_FRAMES = 1
+TOP_FUNCTIONS = 20
+TOP_ALLOCATIONS = 15
+
+_enabled = None                 # None이면 PROFILE 환경 변수를 따름
+_session = time.strftime("%Y%m%d-%H%M%S")   # 같은 결과 폴더에서 여러 번 실행해도 파일이 겹치지 않도록
+_sequence = itertools.count(1)
+_trace_lock = threading.Lock()
+_active_stages = set()
+_trace_started = False
+_write_lock = threading.Lock()
+
+
+def enable_profiling(enabled=True):
+    """--profile 옵션처럼 코드에서 프로파일링을 켜거나 끕니다."""
+    global _enabled
+    _enabled = enabled
+
+
+def profiling_enabled():
+    if _enabled is not None:
+        return _enabled
+    return os.environ.get("PROFILE", "").strip().lower() in ("1", "true", "yes")
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _StageState:
+    """실행 중인 단계 하나입니다. 다른 단계와 시간이 한 번이라도 겹치면 overlapped가 됩니다."""
+
+    def __init__(self):
+        self.overlapped = False
+
+
+class _Sampler:
+    """
+    대상 스레드들의 호출 스택을 주기적으로 수집하여 collapsed stack 형식으로 셉니다.
+    stacks는 단계 스레드, helper_stacks는 단계 도중 새로 시작된 스레드의 스택입니다.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.helper_stacks = Counter()
+        self.samples = 0
+        self._existing = set(sys._current_frames())   # 단계 시작 전부터 있던 스레드는 제외
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="Profiler sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (thread_id != self.thread_id and thread_id in self._existing):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if thread_id == self.thread_id:
+                    stack.append("stage")
+                    self.stacks[";".join(reversed(stack))] += 1
+                else:
+                    stack.append(f"thread {names.get(thread_id, thread_id)}".replace(";", ","))
+                    self.helper_stacks[";".join(reversed(stack))] += 1
+
+
+def _start_tracing(state):
+    """
+    여러 단계가 겹쳐도 tracemalloc을 한 번만 시작하고, 마지막 단계가 끝나면 멈춥니다.
+    최대 메모리는 프로세스 전체 값이므로, 다른 단계가 실행 중이면 초기화하지 않고 겹친 단계들을 표시합니다.
+    """
+    global _trace_started
+    with _trace_lock:
+        if not _active_stages and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            _trace_started = True
+        if _active_stages:
+            state.overlapped = True
+            for other in _active_stages:
+                other.overlapped = True
+        elif hasattr(tracemalloc, "reset_peak"):   # Python 3.9+
+            tracemalloc.reset_peak()
+        _active_stages.add(state)
+        return tracemalloc.get_traced_memory()[0]
+
+
+def _stop_tracing(state):
+    global _trace_started
+    with _trace_lock:
+        _active_stages.discard(state)
+        if not _active_stages and _trace_started:
+            tracemalloc.stop()
+            _trace_started = False
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ))
+
+
+def _top_functions(stacks):
+    """(함수, 자기 자신에서 보인 샘플 수, 호출 스택에 포함된 샘플 수) 목록을 반환합니다."""
+    self_counts, total_counts = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_counts[frames[-1]] += count
+        for frame in set(frames[1:]):
+            total_counts[frame] += count
+    return [(name, self_counts[name], total) for name, total in total_counts.most_common(TOP_FUNCTIONS)]
+
+
+def _write_report(stage, status, sampler, wall, cpu, memory, overlapped):
+    directory = os.path.join(current_run().output_dir, PROFILE_DIR)
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, f"{_session}_{next(_sequence):03d}_{stage}")
+    # 겹친 단계는 새로 시작된 스레드가 어느 단계의 것인지 알 수 없으므로 단계 스레드만 남깁니다.
+    stacks = sampler.stacks if overlapped else sampler.stacks + sampler.helper_stacks
+
+    with open(base + ".collapsed", "w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+    lines = [f"단계: {stage} ({status})"]
+    if overlapped:
+        lines.append("※ 다른 단계와 실행 시간이 겹쳐 최대 메모리와 보조 스레드 샘플은 기록하지 않았습니다. "
+                     "메모리 값은 프로세스 전체 기준입니다.")
+    peak = "측정 안 함(겹침)" if memory["peak_kb"] is None else f"{memory['peak_kb']:.1f}KB"
+    lines += [
+        f"실행 시간: {wall:.3f}초, 단계 스레드 CPU 시간: {cpu:.3f}초 (나머지는 대기: 네트워크, 다른 스레드 등)",
+        f"샘플: {sampler.samples}회 ({sampler.interval * 1000:.0f}ms 간격)",
+        "",
+        "[많이 보인 함수] 포함 샘플 / 자기 자신 샘플",
+    ]
+    for name, own, total in _top_functions(stacks):
+        lines.append(f"  {total:6d} {own:6d}  {name}")
+    lines += [
+        "",
+        f"[메모리] 시작 {memory['start_kb']:.1f}KB, 최대 {peak}, 종료 {memory['end_kb']:.1f}KB",
+        "[할당이 가장 많이 늘어난 코드 줄]",
+    ]
+    for stat in memory["top"]:
+        lines.append(f"  {stat.size_diff / 1024:+10.1f}KB {stat.count_diff:+7d}개  {stat.traceback}")
+    with open(base + ".txt", "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+    summary = {
+        "stage": stage, "status": status, "wall_seconds": round(wall, 3), "cpu_seconds": round(cpu, 3),
+        "samples": sampler.samples, "overlapped": overlapped, "memory_start_kb": round(memory["start_kb"], 1),
+        "memory_peak_kb": None if memory["peak_kb"] is None else round(memory["peak_kb"], 1),
+        "memory_end_kb": round(memory["end_kb"], 1), "report": base + ".txt",
+    }
+    with _write_lock:
+        with open(os.path.join(directory, "all.collapsed"), "a", encoding="utf-8") as f:
+            for stack, count in stacks.items():
+                f.write(f"{stage};{stack} {count}\n")
+        with open(os.path.join(directory, "summary.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+    print(f"프로파일: {stage} {wall:.2f}초 (CPU {cpu:.2f}초), 최대 메모리 {peak} -> {base}.txt")
+
+
+@contextmanager
+def profile_stage(stage):
+    """
+    with 블록(단계 하나)을 프로파일링합니다. 프로파일링이 꺼져 있으면 아무것도 하지 않습니다.
+    리포트를 저장하지 못해도 단계 실행에는 영향을 주지 않습니다.
+    """
+    if not profiling_enabled():
+        yield
+        return
+
+    state = _StageState()
+    start_bytes = _start_tracing(state)
+    before = _snapshot()
+    sampler = _Sampler(threading.get_ident())
+    sampler.start()
+    wall_start, cpu_start = time.perf_counter(), time.thread_time()
+    status = "ok"
+    try:
+        yield
+    except BaseException as e:
+        status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        wall, cpu = time.perf_counter() - wall_start, time.thread_time() - cpu_start
+        sampler.stop()
+        try:
+            end_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            overlapped = state.overlapped
+            memory = {
+                "start_kb": start_bytes / 1024, "end_kb": end_bytes / 1024,
+                "peak_kb": None if overlapped else peak_bytes / 1024,
+                "top": _snapshot().compare_to(before, "lineno")[:TOP_ALLOCATIONS],
+            }
+            _write_report(stage, status, sampler, wall, cpu, memory, overlapped)
+        except Exception as e:
+            print(f"프로파일 리포트 저장 실패 ({stage}): {e}")
+        finally:
+            _stop_tracing(state)
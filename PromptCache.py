@@ -0,0 +1,215 @@
+"""
+작성 루프(Writer 재시도 + Teacher 채점) 동안 바뀌지 않는 프롬프트 앞부분을 캐시합니다.
+분석 데이터와 Rules.txt처럼 매 시도마다 같은 내용을 한 번만 업로드하고(Gemini cachedContents),
+이후 요청에서는 캐시 이름과 바뀐 부분(이전 초안, 피드백)만 보냅니다.
+
+PROMPT_CACHE 환경 변수로 구현을 고릅니다.
+    gemini (기본값): Gemini 컨텍스트 캐시 API 사용
+    local: 네트워크 없이 재사용 통계만 기록하는 로컬 대체 구현 (테스트용, 요청은 그대로 전체를 보냄)
+    off: 캐시 사용 안 함
+"""
+import os
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from RunContext import RunContext, RunAborted
+from GeminiClient import send_request, inline_payload
+
+CACHE_URL = "https://generativelanguage.googleapis.com/v1beta/cachedContents?key={key}"
+CACHE_ITEM_URL = "https://generativelanguage.googleapis.com/v1beta/{name}?key={key}"
+
+# 실행이 비정상 종료되어 삭제하지 못해도 이 시간이 지나면 서버에서 만료됩니다.
+CACHE_TTL_SECONDS = 3600
+# 모델별 최소 캐시 크기(약 1024~4096 토큰)보다 확실히 작은 앞부분은 캐시를 만들지 않습니다.
+MIN_PREFIX_CHARS = 2048
+RELEASE_TIMEOUT_SECONDS = 10
+
+
+def _prefix_key(api_key, model, static_prefix):
+    # cachedContents는 만든 키(프로젝트)에서만 사용할 수 있으므로 키별로 따로 관리합니다.
+    return api_key, model, hashlib.sha256(static_prefix.encode("utf-8")).hexdigest()
+
+
+def cached_payload(name, payload):
+    """
+    캐시를 사용하는 요청을 만듭니다.
+    cachedContent와 systemInstruction은 함께 보낼 수 없으므로 시스템 지시문은 사용자 프롬프트 앞에 넣습니다.
+    """
+    system_text = payload.get("systemInstruction", {}).get("parts", [{}])[0].get("text", "")
+    text = payload["contents"][0]["parts"][0]["text"]
+    if system_text:
+        text = f"[역할 지시]\n{system_text}\n\n{text}"
+    request = {k: v for k, v in payload.items() if k not in ("contents", "systemInstruction")}
+    request["cachedContent"] = name
+    request["contents"] = [{"role": "user", "parts": [{"text": text}]}]
+    return request
+
+
+class _BasePromptCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._memo = {}
+        self.hits = 0
+        self.misses = 0
+        self.reused_chars = 0
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def remember(self, key, compute):
+        """
+        실행 동안 한 번만 계산할 값(예: Teacher의 채점 항목)을 저장해 두고 재사용합니다.
+        compute()가 None을 반환하면 저장하지 않습니다.
+        """
+        with self._key_lock(("memo", key)):
+            if key in self._memo:
+                return self._memo[key]
+            value = compute()
+            if value is not None:
+                self._memo[key] = value
+            return value
+
+    def remembered(self):
+        """remember()로 저장한 값들을 체크포인트에 넣을 수 있도록 dict로 반환합니다."""
+        with self._lock:
+            return dict(self._memo)
+
+    def seed(self, values):
+        """재시작할 때 체크포인트에 저장해 둔 값들을 다시 채웁니다. 이미 계산한 값은 덮어쓰지 않습니다."""
+        with self._lock:
+            for key, value in (values or {}).items():
+                self._memo.setdefault(key, value)
+
+    def _count(self, hit, static_prefix):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.reused_chars += len(static_prefix)
+            else:
+                self.misses += 1
+
+    def stats(self):
+        return f"재사용 {self.hits}회, 새로 생성 {self.misses}회, 재사용된 앞부분 {self.reused_chars}자"
+
+
+class GeminiPromptCache(_BasePromptCache):
+    """Gemini cachedContents API로 모델별 캐시를 만들고 실행이 끝나면 삭제합니다."""
+
+    def __init__(self, ttl_seconds=CACHE_TTL_SECONDS):
+        super().__init__()
+        self.ttl_seconds = ttl_seconds
+        self._handles = {}   # (API 키, 모델, 앞부분 해시) -> 캐시 이름 (None이면 캐시 불가)
+        self._created = []   # (캐시 이름, API 키)
+
+    def build_payload(self, model, api_key, static_prefix, payload, run):
+        key = _prefix_key(api_key, model, static_prefix)
+        with self._key_lock(key):
+            if key in self._handles:
+                name = self._handles[key]
+                if name:
+                    self._count(True, static_prefix)
+            else:
+                name = self._create(model, api_key, static_prefix, run)
+                self._handles[key] = name
+                if name:
+                    self._count(False, static_prefix)
+        return cached_payload(name, payload) if name else inline_payload(static_prefix, payload)
+
+    def _create(self, model, api_key, static_prefix, run):
+        """캐시를 만들고 이름을 반환합니다. 만들 수 없으면 None을 반환합니다 (그 모델은 일반 요청으로 보냄)."""
+        if len(static_prefix) < MIN_PREFIX_CHARS:
+            return None
+        remaining = run.remaining()
+        ttl = self.ttl_seconds if remaining is None else min(self.ttl_seconds, int(remaining) + 60)
+        body = {
+            "model": f"models/{model}",
+            "contents": [{"role": "user", "parts": [{"text": static_prefix}]}],
+            "ttl": f"{ttl}s",
+        }
+        run.add_api_call()
+        try:
+            response = send_request(CACHE_URL.format(key=api_key), body, run)
+        except RunAborted:
+            raise
+        except Exception as e:
+            print(f"프롬프트 캐시 생성 실패 ({model}): {e}")
+            return None
+
+        if response.status_code != 200:
+            # 캐시를 지원하지 않는 모델이거나 최소 토큰 수보다 작은 경우입니다.
+            print(f"프롬프트 캐시를 사용하지 않습니다 ({model}, Status {response.status_code})")
+            return None
+        name = response.json().get("name")
+        if name:
+            with self._lock:
+                self._created.append((name, api_key))
+            print(f"프롬프트 캐시 생성: {name} ({model}, {len(static_prefix)}자, TTL {ttl}초)")
+        return name
+
+    def release(self):
+        """이번 실행에서 만든 캐시를 모두 삭제합니다. 실행이 취소된 뒤에도 호출할 수 있습니다."""
+        with self._lock:
+            created, self._created = self._created, []
+        for name, api_key in created:
+            try:
+                response = send_request(CACHE_ITEM_URL.format(name=name, key=api_key), None,
+                                        RunContext(RELEASE_TIMEOUT_SECONDS), method="DELETE")
+                if response.status_code not in (200, 404):
+                    print(f"프롬프트 캐시 삭제 실패 ({name}, Status {response.status_code}), TTL 후 만료됩니다.")
+            except Exception as e:
+                print(f"프롬프트 캐시 삭제 실패 ({name}): {e}, TTL 후 만료됩니다.")
+        print(f"프롬프트 캐시: {self.stats()}")
+
+
+class LocalPromptCache(_BasePromptCache):
+    """
+    네트워크 캐시 없이 같은 인터페이스를 제공하는 로컬 대체 구현입니다.
+    요청은 항상 전체 프롬프트로 보내고, 앞부분이 실제로 재사용되는지만 기록합니다.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._seen = set()
+
+    def build_payload(self, model, api_key, static_prefix, payload, run):
+        key = _prefix_key(api_key, model, static_prefix)
+        with self._lock:
+            hit = key in self._seen
+            self._seen.add(key)
+        self._count(hit, static_prefix)
+        return inline_payload(static_prefix, payload)
+
+    def release(self):
+        print(f"프롬프트 캐시(로컬): {self.stats()}")
+
+
+def create_prompt_cache():
+    """PROMPT_CACHE 환경 변수에 맞는 캐시를 만듭니다. off이면 None을 반환합니다."""
+    mode = os.environ.get("PROMPT_CACHE", "gemini").strip().lower()
+    if mode == "off":
+        return None
+    if mode == "local":
+        return LocalPromptCache()
+    return GeminiPromptCache()
+
+
+@contextmanager
+def prompt_cache_scope(run):
+    """
+    with 블록 동안 run(과 하위 컨텍스트)이 같은 프롬프트 캐시를 사용하게 하고, 끝나면 캐시를 삭제합니다.
+    이미 캐시가 지정된 실행이면 그 캐시를 그대로 사용합니다.
+    """
+    if run.prompt_cache is not None:
+        yield run.prompt_cache
+        return
+    cache = create_prompt_cache()
+    run.prompt_cache = cache
+    try:
+        yield cache
+    finally:
+        run.prompt_cache = None
+        if cache is not None:
+            cache.release()
@@ -0,0 +1,274 @@
+"""
+작성 루프의 모든 결과(공고, 분석 데이터, 시도별 초안, 채점표, 점수)를 실행(run) 단위로 보관하는 아카이브입니다.
+res의 result_attempt*.txt / teacher_feedback.txt는 다음 실행에서 덮어써지므로, 이력 조회와 검색은 이 아카이브를 사용합니다.
+
+- 본문은 zlib으로 압축하고 내용 해시로 중복 저장하지 않습니다 (같은 지원자/공고 데이터는 한 번만 저장).
+- 전문 검색은 FTS5 contentless 인덱스(trigram: 한국어 부분 문자열 검색 가능)를 사용합니다.
+- 초안은 항목(1. 지원동기 등)별로도 저장하여 "X 기업의 점수가 가장 높은 지원동기" 같은 조회가 가능합니다.
+
+사용 예:
+    python ResultArchive.py best --company 넥슨 --section 1
+    python ResultArchive.py search "데이터 파이프라인"
+    python ResultArchive.py export archive.jsonl
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import argparse
+from contextlib import closing
+
+from DraftLinter import SECTIONS, split_sections
+from PostingIndex import company_name
+
+DEFAULT_DB_PATH = os.path.join("res", "archive.db")
+COMPRESSION_LEVEL = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    company TEXT,
+    posting_source TEXT,
+    inputs_fingerprint TEXT,
+    output_dir TEXT,
+    passed INTEGER,
+    best_score INTEGER,
+    best_attempt INTEGER,
+    reason TEXT
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    hash TEXT NOT NULL UNIQUE,
+    body BLOB NOT NULL,
+    chars INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,          -- posting / company / applicant / project / draft / section / feedback
+    attempt INTEGER NOT NULL DEFAULT 0,
+    section INTEGER NOT NULL DEFAULT 0,
+    score INTEGER,
+    verdict TEXT,                -- yes / no / lint
+    blob_id INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (run_id, kind, attempt, section)
+);
+CREATE INDEX IF NOT EXISTS idx_documents_lookup ON documents (kind, section, score);
+CREATE INDEX IF NOT EXISTS idx_documents_blob ON documents (blob_id);
+CREATE INDEX IF NOT EXISTS idx_runs_company ON runs (company);
+"""
+
+# 분석 데이터 파일 -> 문서 종류
+INPUT_KINDS = {
+    "posting": "job_description.txt",
+    "company": "Company_data.txt",
+    "applicant": "Applicant_data.txt",
+    "project": "Project_data.txt",
+}
+
+
+def _compress(text):
+    return zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def _decompress(body):
+    return zlib.decompress(body).decode("utf-8")
+
+
+def posting_source(posting):
+    first_line = (posting or "").split("\n", 1)[0]
+    return first_line.split(":", 1)[1].strip() if first_line.startswith("JOB POSTING SOURCE:") else ""
+
+
+class ResultArchive:
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            try:
+                conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(body, content='', tokenize='trigram')")
+            except sqlite3.OperationalError:
+                # trigram 토크나이저가 없는 구버전 SQLite
+                conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(body, content='')")
+            conn.commit()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return closing(conn)
+
+    def _store_blob(self, conn, text):
+        """본문을 압축 저장하고 blob id를 반환합니다. 같은 내용은 한 번만 저장하고 색인합니다."""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        row = conn.execute("SELECT id FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row:
+            return row["id"]
+        cur = conn.execute("INSERT INTO blobs (hash, body, chars) VALUES (?, ?, ?)",
+                           (digest, _compress(text), len(text)))
+        conn.execute("INSERT INTO documents_fts (rowid, body) VALUES (?, ?)", (cur.lastrowid, text))
+        return cur.lastrowid
+
+    def _add_document(self, conn, run_id, kind, text, attempt=0, section=0, score=None, verdict=None):
+        if not text:
+            return
+        blob_id = self._store_blob(conn, text)
+        conn.execute(
+            "INSERT OR REPLACE INTO documents (run_id, kind, attempt, section, score, verdict, blob_id, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, kind, attempt, section, score, verdict, blob_id, time.time()),
+        )
+
+    # --- 기록 ---
+
+    def start_run(self, inputs, inputs_fingerprint="", output_dir=""):
+        """
+        새 실행을 만들고 id를 반환합니다.
+        inputs: {"posting": 공고 본문, "company": 기업 분석, "applicant": ..., "project": ...}
+        """
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO runs (started_at, company, posting_source, inputs_fingerprint, output_dir) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (time.time(), company_name(inputs.get("company")), posting_source(inputs.get("posting")),
+                 inputs_fingerprint, output_dir),
+            )
+            run_id = cur.lastrowid
+            for kind, text in inputs.items():
+                self._add_document(conn, run_id, kind, text)
+            conn.commit()
+            return run_id
+
+    def add_attempt(self, run_id, attempt, draft, feedback, score=None, verdict=None):
+        """시도 하나의 초안(전체 + 항목별)과 채점표/규칙 검사 피드백을 저장합니다."""
+        with self._connect() as conn:
+            self._add_document(conn, run_id, "draft", draft, attempt, 0, score, verdict)
+            for number, (title, body) in split_sections(draft or "").items():
+                self._add_document(conn, run_id, "section", f"{number}. {title}\n{body}", attempt, number, score, verdict)
+            self._add_document(conn, run_id, "feedback", feedback, attempt, 0, score, verdict)
+            conn.commit()
+
+    def finish_run(self, run_id, passed, best_score=None, best_attempt=None, reason=None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET finished_at = ?, passed = ?, best_score = ?, best_attempt = ?, reason = ? WHERE id = ?",
+                (time.time(), int(bool(passed)), best_score, best_attempt, reason, run_id),
+            )
+            conn.commit()
+
+    # --- 조회 ---
+
+    def best_section(self, company, section, limit=1):
+        """
+        기업명(또는 공고 출처)에 company가 포함된 실행 중 해당 항목(1~4)의 점수가 가장 높은 본문을 반환합니다.
+        결과: [{"run_id", "company", "attempt", "score", "text"}, ...]
+        """
+        pattern = f"%{company}%"
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT d.run_id, r.company, d.attempt, d.score, b.body FROM documents d "
+                "JOIN runs r ON r.id = d.run_id JOIN blobs b ON b.id = d.blob_id "
+                "WHERE d.kind = 'section' AND d.section = ? AND d.score IS NOT NULL "
+                "AND (r.company LIKE ? OR r.posting_source LIKE ?) "
+                "ORDER BY d.score DESC, d.created_at DESC LIMIT ?",
+                (section, pattern, pattern, limit),
+            ).fetchall()
+        return [{"run_id": row["run_id"], "company": row["company"], "attempt": row["attempt"],
+                 "score": row["score"], "text": _decompress(row["body"])} for row in rows]
+
+    def search(self, query, kind=None, limit=20):
+        """
+        전문 검색: query가 포함된 문서를 점수 높은 순으로 반환합니다.
+        (trigram 인덱스이므로 3글자 이상 검색어는 부분 문자열로 찾습니다)
+        """
+        match = '"' + query.replace('"', '""') + '"'
+        sql = ("SELECT d.run_id, r.company, d.kind, d.attempt, d.section, d.score, b.body FROM documents_fts f "
+               "JOIN blobs b ON b.id = f.rowid JOIN documents d ON d.blob_id = b.id JOIN runs r ON r.id = d.run_id "
+               "WHERE documents_fts MATCH ?")
+        params = [match]
+        if kind:
+            sql += " AND d.kind = ?"
+            params.append(kind)
+        sql += " ORDER BY d.score IS NULL, d.score DESC, d.created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [{"run_id": row["run_id"], "company": row["company"], "kind": row["kind"], "attempt": row["attempt"],
+                 "section": row["section"], "score": row["score"], "text": _decompress(row["body"])} for row in rows]
+
+    def export_jsonl(self, path, company=None):
+        """문서를 실행 정보와 함께 한 줄에 하나씩 JSONL로 내보내고 내보낸 줄 수를 반환합니다."""
+        sql = ("SELECT r.id AS run_id, r.company, r.posting_source, r.started_at, r.passed, r.best_score, "
+               "d.kind, d.attempt, d.section, d.score, d.verdict, b.body FROM documents d "
+               "JOIN runs r ON r.id = d.run_id JOIN blobs b ON b.id = d.blob_id")
+        params = []
+        if company:
+            sql += " WHERE r.company LIKE ? OR r.posting_source LIKE ?"
+            params += [f"%{company}%", f"%{company}%"]
+        sql += " ORDER BY r.id, d.attempt, d.kind, d.section"
+        count = 0
+        with self._connect() as conn, open(path, "w", encoding="utf-8") as f:
+            for row in conn.execute(sql, params):
+                record = {key: row[key] for key in row.keys() if key != "body"}
+                record["text"] = _decompress(row["body"])
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+        return count
+
+    def stats(self):
+        with self._connect() as conn:
+            runs = conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+            docs = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            row = conn.execute("SELECT COUNT(*), COALESCE(SUM(chars), 0), COALESCE(SUM(LENGTH(body)), 0) FROM blobs").fetchone()
+        return {"runs": runs, "documents": docs, "blobs": row[0], "text_chars": row[1], "stored_bytes": row[2]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="자기소개서 결과 아카이브 조회")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    best = sub.add_parser("best", help="기업별 최고 점수 항목 조회")
+    best.add_argument("--company", required=True)
+    best.add_argument("--section", type=int, default=1,
+                      help=", ".join(f"{number}={name}" for number, name, _ in SECTIONS))
+    best.add_argument("--limit", type=int, default=1)
+
+    search = sub.add_parser("search", help="전문 검색")
+    search.add_argument("query")
+    search.add_argument("--kind", default=None)
+    search.add_argument("--limit", type=int, default=20)
+
+    export = sub.add_parser("export", help="JSONL로 내보내기")
+    export.add_argument("path")
+    export.add_argument("--company", default=None)
+
+    sub.add_parser("stats", help="저장 현황")
+
+    args = parser.parse_args(argv)
+    archive = ResultArchive(args.db)
+
+    if args.command == "best":
+        for item in archive.best_section(args.company, args.section, args.limit):
+            print(f"[실행 {item['run_id']} / {item['company']} / 시도 {item['attempt']} / {item['score']}점]\n{item['text']}\n")
+    elif args.command == "search":
+        for item in archive.search(args.query, args.kind, args.limit):
+            preview = item["text"][:200].replace("\n", " ")
+            print(f"[실행 {item['run_id']} / {item['company']} / {item['kind']} 시도 {item['attempt']} / {item['score']}점] {preview}")
+    elif args.command == "export":
+        print(f"{archive.export_jsonl(args.path, args.company)}개 문서를 {args.path}에 저장했습니다.")
+    else:
+        print(archive.stats())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
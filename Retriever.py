@@ -0,0 +1,128 @@
+"""
+지원자/프로젝트 분석 결과를 구간(segment)으로 나누고 BM25로 순위를 매겨,
+채용공고의 직무 내용과 자격요건·우대 사항에 관련된 부분만 Writer 프롬프트에 넣습니다.
+"""
+import re
+import math
+from collections import Counter
+
+from PostingIndex import split_analysis_sections
+
+# Writer 프롬프트에 넣을 지원자+프로젝트 데이터의 최대 글자 수
+CONTEXT_BUDGET_CHARS = 6000
+MAX_SEGMENT_CHARS = 800
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_HEADING = re.compile(r"^\s*(#{1,6}\s|\*\*\s*\[?\d+\.|\*\*\[|-{3,}\s*$)")
+_HANGUL = re.compile(r"[가-힣]")
+
+
+def tokenize(text):
+    """
+    영문/숫자는 단어 단위, 한글은 조사가 붙어도 맞도록 글자 2-gram 단위로 토큰화합니다.
+    (예: '데이터를' -> '데이', '이터', '터를')
+    """
+    tokens = []
+    for word in re.findall(r"\w+", text.lower()):
+        if _HANGUL.search(word) and len(word) > 2:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def segment(text):
+    """제목 줄을 기준으로 구간을 나누고, 너무 긴 구간은 문단 단위로 다시 나눕니다."""
+    blocks, current = [], []
+    for line in text.splitlines():
+        if _HEADING.match(line) and current:
+            blocks.append("\n".join(current).strip())
+            current = []
+        if not re.fullmatch(r"\s*-{3,}\s*", line):
+            current.append(line)
+    if current:
+        blocks.append("\n".join(current).strip())
+
+    segments = []
+    for block in filter(None, blocks):
+        if len(block) <= MAX_SEGMENT_CHARS:
+            segments.append(block)
+            continue
+        chunk = ""
+        for paragraph in re.split(r"\n\s*\n", block):
+            if chunk and len(chunk) + len(paragraph) > MAX_SEGMENT_CHARS:
+                segments.append(chunk.strip())
+                chunk = ""
+            chunk += paragraph + "\n\n"
+        if chunk.strip():
+            segments.append(chunk.strip())
+    return segments
+
+
+class BM25Index:
+    def __init__(self, documents):
+        self.documents = documents
+        self.term_freqs = [Counter(tokenize(doc)) for doc in documents]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0
+        doc_freq = Counter(term for tf in self.term_freqs for term in tf)
+        n = len(documents)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    def score(self, query):
+        """각 문서의 BM25 점수 목록을 반환합니다."""
+        query_terms = Counter(tokenize(query))
+        scores = []
+        for tf, length in zip(self.term_freqs, self.lengths):
+            score = 0.0
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self.avg_length) if self.avg_length else BM25_K1
+            for term, qf in query_terms.items():
+                f = tf.get(term)
+                if f:
+                    score += self.idf[term] * f * (BM25_K1 + 1) / (f + norm) * qf
+            scores.append(score)
+        return scores
+
+
+def build_query(company_data):
+    """기업 분석 결과에서 '2. 직무명과 업무 내용'과 '3. 직무별 자격요건 & 우대 사항'을 검색어로 사용합니다."""
+    sections = split_analysis_sections(company_data)
+    if sections:
+        return sections[2] + "\n" + sections[3]
+    return company_data
+
+
+def select_relevant_context(company_data, applicant_data, project_data, budget=CONTEXT_BUDGET_CHARS):
+    """
+    지원자/프로젝트 분석 결과 중 공고와 관련도가 높은 구간을 budget 글자 안에서 골라
+    (지원자 데이터, 프로젝트 데이터)로 반환합니다. 원문 순서는 유지합니다.
+    전체 분량이 budget 이하이면 원문을 그대로 반환합니다.
+    """
+    if len(applicant_data) + len(project_data) <= budget:
+        return applicant_data, project_data
+
+    sources = [("applicant", seg) for seg in segment(applicant_data)] + \
+              [("project", seg) for seg in segment(project_data)]
+    if not sources:
+        return applicant_data, project_data
+
+    index = BM25Index([seg for _, seg in sources])
+    scores = index.score(build_query(company_data))
+    ranked = sorted(range(len(sources)), key=lambda i: scores[i], reverse=True)
+
+    chosen, used = set(), 0
+    for i in ranked:
+        size = len(sources[i][1])
+        if used + size > budget:
+            continue
+        chosen.add(i)
+        used += size
+
+    print(f"Retriever: {len(sources)}개 구간 중 {len(chosen)}개 선택 ({used}/{len(applicant_data) + len(project_data)}자)")
+    picked = {"applicant": [], "project": []}
+    for i in sorted(chosen):
+        source, seg = sources[i]
+        picked[source].append(seg)
+    return "\n\n".join(picked["applicant"]), "\n\n".join(picked["project"])
@@ -0,0 +1,180 @@
+"""
+한 번의 실행(run)에 대한 마감 시간(deadline)과 취소 상태를 관리합니다.
+Pipeline을 실행하는 스레드에서 use_run()으로 활성화하면, 각 에이전트는 current_run()으로
+남은 시간을 확인해 HTTP/Selenium 타임아웃을 정하고 취소 요청 시 즉시 중단합니다.
+"""
+import os
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# HTTP 요청 기본 타임아웃 (초)
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 180
+# 분석/작성 결과 파일을 저장하는 기본 폴더
+DEFAULT_OUTPUT_DIR = "res"
+
+
+class RunAborted(Exception):
+    """실행이 취소되었거나 마감 시간을 넘겨 중단되었습니다."""
+
+
+class RunCancelled(RunAborted):
+    def __init__(self, message="사용자가 실행을 중지했습니다."):
+        super().__init__(message)
+
+
+class DeadlineExceeded(RunAborted):
+    def __init__(self, message="실행 제한 시간을 초과했습니다."):
+        super().__init__(message)
+
+
+class RunContext:
+    """
+    deadline_seconds: 실행 전체에 허용되는 시간 (None이면 무제한)
+    connect_timeout / read_timeout: 개별 HTTP 요청의 타임아웃
+    output_dir: 이 실행의 결과 파일 폴더 (워커가 여러 작업을 동시에 실행할 때 작업마다 다르게 지정)
+    """
+
+    def __init__(self, deadline_seconds=None, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, output_dir=DEFAULT_OUTPUT_DIR):
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.output_dir = output_dir
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._closers = {}
+        self._next_token = 0
+        self._parent = None
+        self._parent_token = None
+        self.api_calls = 0
+        # 작성 루프 동안 공유하는 프롬프트 캐시 (PromptCache). 하위 컨텍스트도 같은 캐시를 사용합니다.
+        self.prompt_cache = None
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def remaining(self):
+        """마감까지 남은 시간(초)을 반환합니다. 마감이 없으면 None입니다."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def check(self):
+        """취소되었거나 마감 시간이 지났으면 예외를 발생시킵니다."""
+        if self.cancelled:
+            raise RunCancelled()
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded()
+
+    def timeout(self, limit):
+        """limit과 남은 시간 중 작은 값을 반환합니다. 시간이 없으면 예외를 발생시킵니다."""
+        self.check()
+        remaining = self.remaining()
+        return limit if remaining is None else max(min(limit, remaining), 0.1)
+
+    def request_timeout(self):
+        """requests에 넘길 (connect, read) 타임아웃을 남은 시간에 맞춰 계산합니다."""
+        return (self.timeout(self.connect_timeout), self.timeout(self.read_timeout))
+
+    def output_path(self, filename):
+        """결과 폴더 안의 파일 경로를 반환합니다. 폴더가 없으면 만듭니다."""
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir, exist_ok=True)
+        return os.path.join(self.output_dir, filename)
+
+    def add_api_call(self):
+        """이 실행(및 상위 실행)에서 보낸 API 요청 수를 1 늘립니다. 예산 계산에 사용됩니다."""
+        with self._lock:
+            self.api_calls += 1
+        if self._parent is not None:
+            self._parent.add_api_call()
+
+    def sleep(self, seconds):
+        """취소 요청이 오면 즉시 깨어나는 sleep입니다."""
+        self._cancel_event.wait(self.timeout(seconds))
+        self.check()
+
+    def wait(self, event_or_future, poll_interval=0.1):
+        """
+        다른 스레드에서 실행 중인 작업(future 또는 threading.Event)이 끝날 때까지 기다립니다.
+        기다리는 동안 취소/마감이 발생하면 바로 예외를 발생시킵니다.
+        """
+        done = event_or_future.done if hasattr(event_or_future, "done") else event_or_future.is_set
+        while not done():
+            self.check()
+            self._cancel_event.wait(poll_interval)
+        self.check()
+
+    def register(self, closer):
+        """취소 시 호출할 정리 함수(세션 종료, 드라이버 종료 등)를 등록하고 토큰을 반환합니다."""
+        with self._lock:
+            self._next_token += 1
+            self._closers[self._next_token] = closer
+            token = self._next_token
+        if self.cancelled:
+            self._close(token)
+        return token
+
+    def unregister(self, token):
+        with self._lock:
+            self._closers.pop(token, None)
+
+    def _close(self, token):
+        with self._lock:
+            closer = self._closers.pop(token, None)
+        if closer:
+            try:
+                closer()
+            except Exception as e:
+                print(f"취소 정리 작업 중 오류: {e}")
+
+    def cancel(self):
+        """실행을 취소하고 진행 중인 HTTP 세션/브라우저를 즉시 닫습니다."""
+        self._cancel_event.set()
+        with self._lock:
+            tokens = list(self._closers)
+        for token in tokens:
+            self._close(token)
+
+    def child(self):
+        """
+        같은 마감 시간을 공유하는 하위 컨텍스트를 만듭니다.
+        부모가 취소되면 함께 취소되고, 하위 컨텍스트만 따로 취소할 수도 있습니다 (예: 늦게 끝난 중복 요청).
+        사용이 끝나면 detach()로 부모와의 연결을 끊어야 합니다.
+        """
+        child = RunContext(connect_timeout=self.connect_timeout, read_timeout=self.read_timeout,
+                           output_dir=self.output_dir)
+        child.deadline = self.deadline
+        child.prompt_cache = self.prompt_cache
+        child._parent = self
+        child._parent_token = self.register(child.cancel)
+        return child
+
+    def detach(self):
+        if self._parent is not None:
+            self._parent.unregister(self._parent_token)
+            self._parent = None
+
+
+_current_run = contextvars.ContextVar("current_run", default=None)
+
+
+def current_run():
+    """현재 스레드에서 활성화된 RunContext를 반환합니다. 없으면 제한 없는 기본 컨텍스트를 반환합니다."""
+    run = _current_run.get()
+    return run if run is not None else RunContext()
+
+
+@contextmanager
+def use_run(run):
+    """with 블록 안에서 run을 현재 실행 컨텍스트로 지정합니다."""
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
@@ -1,86 +1,125 @@
-import time
-import re
 import sys
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
 
-def save_job_posting_to_txt(url, filename="job_posting.txt"):
+from RunContext import current_run
+
+# Upper bound for a single page load (further capped by the run deadline)
+PAGE_LOAD_TIMEOUT = 30
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+def extract_clean_text(html):
     """
-    Saves the content of a job posting to a txt file in the 'res' subfolder.
+    Strips scripts, navigation and other boilerplate from an HTML page and returns its visible text,
+    one non-empty line per line.
     """
-    print(f"Current Python path: {sys.executable}")
-    
-    # 1. Create 'res' directory if it doesn't exist
-    output_dir = "res"
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-        print(f"Created directory: {output_dir}")
+    from bs4 import BeautifulSoup
 
-    # Set the full path for the file
-    file_path = os.path.join(output_dir, filename)
-    
-    # 2. Chrome Options Setup
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Remove unnecessary elements
+    for tag in soup(["script", "style", "nav", "footer", "header", "button", "input", "meta", "noscript"]):
+        tag.decompose()
+
+    text_content = soup.get_text(separator='\n')
+    lines = [line.strip() for line in text_content.splitlines() if line.strip()]
+    return '\n'.join(lines)
+
+
+def write_posting_file(file_path, url, clean_text):
+    """Writes a posting in the format the analyzers expect (source header + clean text)."""
+    directory = os.path.dirname(file_path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+        print(f"Created directory: {directory}")
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(f"JOB POSTING SOURCE: {url}\n")
+        f.write("="*60 + "\n\n")
+        f.write(clean_text)
+
+
+def fetch_rendered_html(url):
+    """
+    Loads a page in headless Chrome and returns the rendered HTML (None on failure).
+    Selenium is imported here so that importing this module stays cheap.
+    The page load honours the current run's deadline, and cancelling the run quits the browser immediately.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    # Chrome Options Setup
     chrome_options = Options()
     chrome_options.add_argument("--headless") 
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    chrome_options.add_argument(f"user-agent={USER_AGENT}")
+
+    run = current_run()
+    run.check()
 
-    # 3. Initialize Driver
+    # Initialize Driver
     try:
         service = Service(ChromeDriverManager().install())
         driver = webdriver.Chrome(service=service, options=chrome_options)
     except Exception as e:
         print(f"Driver initialization failed: {e}")
-        return False
+        return None
+
+    # Quitting the driver from the cancelling thread aborts an in-flight page load
+    token = run.register(driver.quit)
 
     try:
         print(f"Connecting to: {url}")
+        driver.set_page_load_timeout(run.timeout(PAGE_LOAD_TIMEOUT))
         driver.get(url)
 
-        # 4. Wait for content to load
-        wait = WebDriverWait(driver, 15)
+        # Wait for content to load
+        wait = WebDriverWait(driver, run.timeout(15))
         wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
         
         # Extra wait for Javascript rendering
-        time.sleep(5)
-
-        # 5. Parse Content
-        html = driver.page_source
-        soup = BeautifulSoup(html, 'html.parser')
-
-        # Remove unnecessary elements
-        for tag in soup(["script", "style", "nav", "footer", "header", "button", "input", "meta", "noscript"]):
-            tag.decompose()
-
-        # 6. Extract and Clean Text
-        text_content = soup.get_text(separator='\n')
-        lines = [line.strip() for line in text_content.splitlines() if line.strip()]
-        clean_text = '\n'.join(lines)
-
-        # 7. Save to File in 'res' folder
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(f"JOB POSTING SOURCE: {url}\n")
-            f.write("="*60 + "\n\n")
-            f.write(clean_text)
-            
-        print(f"Success! Saved to {file_path}")
-        return True
+        run.sleep(5)
+
+        return driver.page_source
 
     except Exception as e:
+        # A cancelled/expired run surfaces as a driver error; report it as such
+        run.check()
         print(f"Error during scraping: {e}")
-        return False
+        return None
 
     finally:
+        run.unregister(token)
         driver.quit()
 
+
+def save_job_posting_to_txt(url, filename="job_posting.txt"):
+    """
+    Saves the content of a job posting to a txt file in the 'res' subfolder (the current run's output folder).
+    """
+    print(f"Current Python path: {sys.executable}")
+    
+    # Set the full path for the file
+    file_path = current_run().output_path(filename)
+
+    html = fetch_rendered_html(url)
+    if html is None:
+        return False
+
+    try:
+        write_posting_file(file_path, url, extract_clean_text(html))
+        print(f"Success! Saved to {file_path}")
+        return True
+    except Exception as e:
+        print(f"Error during scraping: {e}")
+        return False
+
 if __name__ == "__main__":
     test_url = "https://careers.nexon.com/recruit/9113" 
     save_job_posting_to_txt(test_url, "nexon_scraping_result.txt")
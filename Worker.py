@@ -0,0 +1,220 @@
+"""
+헤드리스 배치 워커입니다. JobQueue에서 작업을 lease하여 분석 -> 작성 루프를 실행합니다.
+프로세스가 중간에 죽어도 lease가 만료되면 다시 가져와서 마지막 체크포인트부터 이어서 진행합니다.
+
+API_KEY.txt에 키를 여러 개 등록하고 --threads로 작업을 동시에 실행하면 처리량이 키 개수만큼 늘어납니다.
+full 작업의 결과 파일은 작업마다 res/jobs/<작업 ID>/에 따로 저장됩니다.
+
+사용 예:
+    python Worker.py enqueue --url https://... --resume 이력서.pdf --portfolio 포트폴리오.pdf
+    python Worker.py run --deadline 3600 --threads 4
+    python Worker.py run --once --profile      (단계별 CPU/메모리 프로파일을 <결과 폴더>/profile/에 저장)
+    python Worker.py cancel 3
+    python Worker.py crawl --url https://careers.example.com/jobs --resume 이력서.pdf --portfolio 포트폴리오.pdf
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import threading
+
+from JobQueue import JobQueue, JobCheckpoint, default_owner, heartbeat_loop
+from Pipeline import run_analysis, run_writing_loop
+from RunContext import RunContext, RunCancelled, use_run, DEFAULT_OUTPUT_DIR
+from KeyPool import key_pool
+from CrawlFrontier import crawl_postings
+from Profiler import enable_profiling
+
+# 워커가 가져가는 작업 종류 (GUI 작업은 GUI 프로세스만 실행합니다)
+WORKER_KINDS = ["analysis", "writing", "full"]
+
+
+def job_output_dir(job):
+    """
+    작업의 결과 폴더를 정합니다. payload에 output_dir이 있으면 그 폴더를 사용하고,
+    full 작업은 동시에 실행되어도 섞이지 않도록 작업마다 별도 폴더를 사용합니다.
+    analysis/writing 작업은 GUI와 같은 res 폴더를 공유하므로, 큐가 한 번에 하나만 lease합니다.
+    """
+    if job["payload"].get("output_dir"):
+        return job["payload"]["output_dir"]
+    if job["kind"] == "full":
+        return os.path.join(DEFAULT_OUTPUT_DIR, "jobs", str(job["id"]))
+    return DEFAULT_OUTPUT_DIR
+
+
+# 이력서/포트폴리오 없이 추가한 full 작업은 GUI/analysis 작업이 res에 만들어 둔 분석 결과를 복사해 사용합니다.
+SHARED_ANALYSIS_FILES = {"resume_path": "Applicant_data.txt", "portfolio_path": "Project_data.txt"}
+
+
+def missing_applicant_source(resume_path):
+    """full 작업에 지원자 분석 자료(--resume 또는 res/Applicant_data.txt)가 없으면 True를 반환합니다."""
+    return not resume_path and not os.path.exists(os.path.join(DEFAULT_OUTPUT_DIR, "Applicant_data.txt"))
+
+
+def _copy_shared_analysis(run, payload):
+    """작업 폴더가 res가 아니면, 파일을 주지 않은 분석 결과를 공유 res 폴더에서 복사합니다."""
+    if os.path.abspath(run.output_dir) == os.path.abspath(DEFAULT_OUTPUT_DIR):
+        return
+    for field, filename in SHARED_ANALYSIS_FILES.items():
+        shared = os.path.join(DEFAULT_OUTPUT_DIR, filename)
+        target = run.output_path(filename)
+        if not payload.get(field) and os.path.exists(shared) and not os.path.exists(target):
+            shutil.copyfile(shared, target)
+            print(f"Worker: 공유 분석 결과 {shared}을(를) 사용합니다.")
+
+
+def run_job(queue, job, owner, deadline_seconds=None, speculative=None):
+    """lease한 작업 하나를 실행하고 성공/실패를 큐에 기록합니다."""
+    job_id = job["id"]
+    payload = job["payload"]
+    checkpoint = JobCheckpoint(queue, job_id, owner)
+    run = RunContext(deadline_seconds, output_dir=job_output_dir(job))
+
+    stop_event = threading.Event()
+    heartbeat = threading.Thread(target=heartbeat_loop, args=(queue, job_id, owner, run, stop_event), daemon=True)
+    heartbeat.start()
+
+    def on_status(text, color):
+        print(f"[작업 {job_id}] {text}")
+
+    try:
+        with use_run(run):
+            if job["kind"] == "full":
+                _copy_shared_analysis(run, payload)
+            if job["kind"] in ("analysis", "full"):
+                run_analysis(payload.get("url", ""), payload.get("resume_path", ""),
+                             payload.get("portfolio_path", ""), on_status, checkpoint,
+                             posting_path=payload.get("posting_path", ""))
+            if job["kind"] in ("writing", "full"):
+                outcome = run_writing_loop(on_status, checkpoint, speculative=speculative)
+                if not outcome["passed"]:
+                    print(f"Worker: 작업 {job_id} 합격 초안 없음 ({outcome['reason']}) -> "
+                          f"최고 점수 {outcome['best_score']}점 초안 저장")
+        if not queue.complete(job_id, owner):
+            print(f"Worker: 작업 {job_id}의 lease를 잃어 완료 상태를 기록하지 않았습니다.")
+            return False
+        print(f"Worker: 작업 {job_id} 완료")
+        return True
+    except RunCancelled as e:
+        if queue.is_cancel_requested(job_id):
+            queue.mark_cancelled(job_id, e, owner)
+            print(f"Worker: 작업 {job_id} 취소됨")
+        else:
+            # lease를 잃은 경우: 작업은 이미 다른 워커가 가져갔을 수 있으므로 상태를 기록하지 않고 멈춥니다.
+            print(f"Worker: 작업 {job_id}의 lease를 잃어 실행을 멈춥니다.")
+        return False
+    except Exception as e:
+        status = queue.fail(job_id, e, owner=owner)
+        print(f"Worker: 작업 {job_id} 실패 ({e}) -> {status or 'lease를 잃어 기록하지 않음'}")
+        return False
+    finally:
+        stop_event.set()
+        key_pool().save_usage_report()
+
+
+def _worker_loop(queue, owner, once, poll_interval, deadline_seconds, speculative):
+    while True:
+        job = queue.lease(owner, kinds=WORKER_KINDS)
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+        print(f"Worker: 작업 {job['id']} ({job['kind']}, {job['attempts']}번째 시도) 실행 [{owner}]")
+        run_job(queue, job, owner, deadline_seconds, speculative)
+
+
+def run_worker(queue, once=False, poll_interval=5, deadline_seconds=None, threads=1, speculative=None):
+    """
+    큐가 빌 때까지(once=True) 또는 계속해서 작업을 처리합니다.
+    threads개의 작업을 동시에 실행하며, 각 스레드는 별도의 lease 소유자로 작업을 가져갑니다.
+    """
+    owner = default_owner()
+    pool = key_pool()
+    print(f"Worker: {owner} 시작 (동시 작업 {threads}개, API 키 {len(pool.keys)}개)")
+    if threads <= 1:
+        _worker_loop(queue, owner, once, poll_interval, deadline_seconds, speculative)
+    else:
+        workers = [
+            threading.Thread(target=_worker_loop,
+                             args=(queue, f"{owner}/{i}", once, poll_interval, deadline_seconds, speculative))
+            for i in range(threads)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    for usage in pool.usage():
+        print(f"Worker: 키 {usage['key']} 요청 {usage['requests']}회 (성공 {usage['successes']}, "
+              f"429 {usage['throttled']}, 오류 {usage['errors']}), 토큰 {usage['tokens']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="자소서 AI Agent 배치 워커")
+    parser.add_argument("--db", default=None, help="작업 큐 SQLite 파일 경로")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = sub.add_parser("enqueue", help="작업 추가")
+    enqueue.add_argument("--kind", default="full", choices=["analysis", "writing", "full"])
+    enqueue.add_argument("--url", default="")
+    enqueue.add_argument("--resume", default="")
+    enqueue.add_argument("--portfolio", default="")
+    enqueue.add_argument("--priority", type=int, default=0)
+    enqueue.add_argument("--max-attempts", type=int, default=3)
+    enqueue.add_argument("--output-dir", default="", help="결과 파일 폴더 (기본값: full 작업은 res/jobs/<작업 ID>, 그 외 res)")
+
+    run = sub.add_parser("run", help="워커 실행")
+    run.add_argument("--once", action="store_true", help="큐가 비면 종료")
+    run.add_argument("--deadline", type=float, default=None, help="작업 하나에 허용되는 최대 실행 시간(초)")
+    run.add_argument("--threads", type=int, default=1, help="동시에 실행할 작업 수 (API 키 개수 정도 권장)")
+    run.add_argument("--speculative", action="store_true", default=None,
+                     help="채점 중에 다음 시도를 미리 작성 (기본값: SPECULATIVE_WRITING 환경 변수)")
+    run.add_argument("--profile", action="store_true", help="단계별 CPU/메모리 프로파일 저장 (PROFILE=1과 같음)")
+
+    cancel = sub.add_parser("cancel", help="작업 취소")
+    cancel.add_argument("job_id", type=int)
+
+    crawl = sub.add_parser("crawl", help="여러 공고/채용 목록 페이지를 병렬 수집하고 공고마다 full 작업 추가")
+    crawl.add_argument("--url", action="append", required=True, help="공고 또는 채용 목록 URL (여러 번 지정 가능)")
+    crawl.add_argument("--resume", default="")
+    crawl.add_argument("--portfolio", default="")
+    crawl.add_argument("--no-expand", action="store_true", help="목록 페이지를 개별 공고로 펼치지 않음")
+    crawl.add_argument("--max-postings", type=int, default=50)
+    crawl.add_argument("--no-enqueue", action="store_true", help="수집만 하고 작업은 추가하지 않음")
+
+    args = parser.parse_args(argv)
+    queue = JobQueue(args.db) if args.db else JobQueue()
+
+    adds_full_jobs = (args.command == "enqueue" and args.kind == "full") or (args.command == "crawl" and not args.no_enqueue)
+    if adds_full_jobs and missing_applicant_source(args.resume):
+        parser.error("full 작업에는 --resume이 필요합니다 (공유 분석 결과 res/Applicant_data.txt도 없습니다).")
+
+    if args.command == "enqueue":
+        payload = {"url": args.url, "resume_path": args.resume, "portfolio_path": args.portfolio}
+        if args.output_dir:
+            payload["output_dir"] = args.output_dir
+        job_id = queue.enqueue(args.kind, payload, priority=args.priority, max_attempts=args.max_attempts)
+        print(f"작업 {job_id}이(가) 추가되었습니다.")
+    elif args.command == "crawl":
+        postings = crawl_postings(args.url, expand_listings=not args.no_expand, max_postings=args.max_postings)
+        for posting in postings:
+            if args.no_enqueue:
+                print(f"{posting['url']} -> {posting['path']}")
+                continue
+            payload = {"url": posting["url"], "posting_path": posting["path"],
+                       "resume_path": args.resume, "portfolio_path": args.portfolio}
+            job_id = queue.enqueue("full", payload)
+            print(f"작업 {job_id}: {posting['url']}")
+    elif args.command == "cancel":
+        queue.request_cancel(args.job_id)
+        print(f"작업 {args.job_id}에 취소를 요청했습니다.")
+    else:
+        if args.profile:
+            enable_profiling()
+        run_worker(queue, once=args.once, deadline_seconds=args.deadline, threads=args.threads,
+                   speculative=args.speculative)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,19 +2,101 @@ import tkinter as tk
 from tkinter import messagebox, filedialog
 import threading
 import os
+import sys
 
-# 각 에이전트 모듈에서 함수를 불러옵니다.
-from WebCrawling import save_job_posting_to_txt
-from Agent_CompanyAnalyzer import analyze_company_info
-from Agent_ApplicantAnalyzer import analyze_applicant_info
-from Agent_ProjectAnalyzer import analyze_project_info
-from Agent_Writer import write_cover_letter
-from Agent_Teacher import grade_cover_letter
+# 분석/작성 파이프라인과 작업 큐를 불러옵니다.
+from Pipeline import run_analysis, run_writing_loop, writing_inputs_fingerprint
+from JobQueue import JobQueue, JobCheckpoint, heartbeat_loop, default_owner
+from RunContext import RunContext, RunCancelled, use_run
+from KeyPool import key_pool
+from Profiler import enable_profiling
 
 # 글로벌 변수로 파일 경로 저장
 resume_path = ""
 portfolio_path = ""
 
+# GUI 실행도 작업 큐에 체크포인트를 남겨, 프로그램이 꺼져도 같은 입력이면 이어서 진행합니다.
+# (큐는 build_gui()에서 생성합니다.)
+job_queue = None
+# 창(프로세스)마다 다른 소유자로 lease하여, 다른 창이 실행 중인 작업을 가져가지 않도록 합니다.
+GUI_OWNER = f"gui:{default_owner()}"
+# GUI 작업은 워커(Worker.py run)가 가져가지 않도록 별도의 종류로 등록합니다.
+GUI_ANALYSIS_KIND = "gui_analysis"
+GUI_WRITING_KIND = "gui_writing"
+
+# 실행 한 번에 허용되는 최대 시간 (초). 초과하면 진행 중인 요청을 끊고 실패 처리합니다.
+ANALYSIS_DEADLINE_SECONDS = 15 * 60
+WRITING_DEADLINE_SECONDS = 60 * 60
+
+# 현재 진행 중인 실행들 ('중지' 버튼이 취소할 대상)
+active_runs = set()
+
+def set_status(text, color):
+    """작업 스레드에서 상태 표시줄을 안전하게 갱신합니다."""
+    root.after(0, lambda: status_label.config(text=text, fg=color))
+
+def lease_gui_job(kind, payload):
+    """같은 입력의 미완료 작업이 있으면 이어받고, 없으면 새로 등록하여 lease합니다."""
+    job_id = job_queue.find_unfinished(kind, payload)
+    if job_id is None:
+        job_id = job_queue.enqueue(kind, payload, priority=10, max_attempts=10)
+    else:
+        print(f"System: 미완료 작업 {job_id}을(를) 이어서 진행합니다.")
+    return job_queue.lease(GUI_OWNER, job_id=job_id)
+
+def stop_workflows():
+    """진행 중인 모든 워크플로우를 중지합니다. 진행 중인 API 요청과 브라우저도 즉시 닫힙니다."""
+    if not active_runs:
+        status_label.config(text="중지할 작업이 없습니다.", fg="gray")
+        return
+    for run in list(active_runs):
+        run.cancel()
+    status_label.config(text="중지 요청을 보냈습니다...", fg="gray")
+
+def run_gui_job(kind, payload, deadline_seconds, runner, on_success, error_prefix):
+    """
+    작업 큐에 등록된 GUI 작업 하나를 실행 컨텍스트(마감 시간, 취소) 안에서 실행합니다.
+    runner(checkpoint)의 반환값을 on_success에 넘깁니다.
+    """
+    job = None
+    run = RunContext(deadline_seconds)
+    active_runs.add(run)
+    stop_event = threading.Event()
+    try:
+        job = lease_gui_job(kind, payload)
+        if job is None:
+            raise Exception("같은 작업이나 res 폴더를 쓰는 다른 작업이 다른 창/워커에서 실행 중입니다. "
+                            "(프로그램이 비정상 종료되었다면 몇 분 뒤 다시 시도하세요.)")
+        # 작성 루프는 lease 시간보다 오래 걸리므로 실행하는 동안 lease를 연장합니다.
+        threading.Thread(target=heartbeat_loop, args=(job_queue, job["id"], GUI_OWNER, run, stop_event),
+                         daemon=True).start()
+        with use_run(run):
+            result = runner(JobCheckpoint(job_queue, job["id"], GUI_OWNER))
+        job_queue.complete(job["id"], GUI_OWNER)
+        on_success(result)
+
+    except RunCancelled as e:
+        if job is not None and job_queue.is_cancel_requested(job["id"]):
+            # Worker.py cancel로 작업 자체를 취소한 경우
+            job_queue.mark_cancelled(job["id"], e, GUI_OWNER)
+            root.after(0, lambda: status_label.config(text="작업이 취소되었습니다.", fg="gray"))
+        else:
+            # '중지' 버튼: 작업을 대기 상태로 돌려 두면 다음 실행이 같은 작업의 체크포인트부터 이어서 진행합니다.
+            if job is not None:
+                job_queue.release(job["id"], e, GUI_OWNER)
+            root.after(0, lambda: status_label.config(text="중지됨: 다시 시작하면 마지막 체크포인트부터 이어서 진행합니다.", fg="gray"))
+    except Exception as e:
+        error_msg = str(e)
+        if job is not None:
+            # '중지'와 같이 대기 상태로 돌려 두어, 다시 시작하면 비용이 드는 단계를 반복하지 않고 체크포인트부터 이어서 진행합니다.
+            job_queue.release(job["id"], error_msg, GUI_OWNER)
+        root.after(0, lambda msg=error_msg: status_label.config(text=f"{error_prefix}: {msg}", fg="red"))
+        root.after(0, lambda msg=error_msg: messagebox.showerror("실패", msg))
+    finally:
+        stop_event.set()
+        active_runs.discard(run)
+        key_pool().save_usage_report()
+
 def select_resume():
     """이력서 파일을 선택합니다."""
     global resume_path
@@ -49,33 +131,19 @@ def start_analysis_workflow():
     status_label.config(text="1단계: 웹 크롤링 진행 중...", fg="blue")
     analysis_button.config(state=tk.DISABLED)
     
-    def run_process():
-        try:
-            if not save_job_posting_to_txt(url, "job_description.txt"):
-                raise Exception("웹 크롤링에 실패했습니다.")
-
-            root.after(0, lambda: status_label.config(text="2단계: Gemini AI 기업 분석 진행 중...", fg="purple"))
-            if not analyze_company_info():
-                raise Exception("기업 분석에 실패했습니다.")
-
-            if resume_path:
-                root.after(0, lambda: status_label.config(text="3단계: 지원자 역량 분석 진행 중...", fg="#E67E22"))
-                if not analyze_applicant_info(resume_path):
-                    raise Exception("지원자 분석에 실패했습니다.")
-
-            if portfolio_path:
-                root.after(0, lambda: status_label.config(text="4단계: 포트폴리오 프로젝트 분석 진행 중...", fg="#16A085"))
-                if not analyze_project_info(portfolio_path):
-                    raise Exception("프로젝트 분석에 실패했습니다.")
+    payload = {"url": url, "resume_path": resume_path, "portfolio_path": portfolio_path}
 
-            root.after(0, lambda: status_label.config(text="완료: 모든 분석 데이터가 res 폴더에 저장되었습니다.", fg="green"))
-            root.after(0, lambda: messagebox.showinfo("성공", "기초 데이터 분석이 완료되었습니다!\n이제 자기소개서 작성을 시작할 수 있습니다."))
-            root.after(0, lambda: writer_button.config(state=tk.NORMAL))
+    def on_success(_):
+        root.after(0, lambda: messagebox.showinfo("성공", "기초 데이터 분석이 완료되었습니다!\n이제 자기소개서 작성을 시작할 수 있습니다."))
+        root.after(0, lambda: writer_button.config(state=tk.NORMAL))
 
-        except Exception as e:
-            error_msg = str(e)
-            root.after(0, lambda msg=error_msg: status_label.config(text=f"오류: {msg}", fg="red"))
-            root.after(0, lambda msg=error_msg: messagebox.showerror("실패", msg))
+    def run_process():
+        try:
+            run_gui_job(
+                GUI_ANALYSIS_KIND, payload, ANALYSIS_DEADLINE_SECONDS,
+                lambda checkpoint: run_analysis(url, resume_path, portfolio_path, set_status, checkpoint),
+                on_success, "오류",
+            )
         finally:
             root.after(0, lambda: analysis_button.config(state=tk.NORMAL))
 
@@ -93,98 +161,110 @@ def start_writing_workflow():
     writer_button.config(state=tk.DISABLED)
     status_label.config(text="Writer: 자기소개서 초안을 작성하고 있습니다...", fg="blue")
 
-    def run_writing_loop():
-        attempt = 1
+    payload = {"inputs": writing_inputs_fingerprint()}
+
+    def on_success(outcome):
+        if outcome["passed"]:
+            root.after(0, lambda: messagebox.showinfo("축하합니다!", f"{outcome['attempt']}번의 수정 끝에 Teacher 에이전트의 승인을 받았습니다.\n결과: res/result.txt"))
+        else:
+            root.after(0, lambda: messagebox.showinfo(
+                "작성 종료",
+                f"{outcome['reason']}에 도달하여 작성을 멈췄습니다.\n"
+                f"최고 점수 초안(시도 {outcome['best_attempt']}, {outcome['best_score']}점)을 저장했습니다.\n"
+                "결과: res/result.txt, 점수 기록: res/score_history.json"))
+
+    def run_process():
         try:
-            while True:
-                root.after(0, lambda a=attempt: status_label.config(text=f"시도 {a}: Writer가 자기소개서를 작성 중입니다...", fg="#2980B9"))
-                
-                # 1. Writer 실행
-                if not write_cover_letter(attempt):
-                    raise Exception("자기소개서 작성 중 API 오류가 발생했습니다.")
-
-                # 2. Teacher 실행
-                root.after(0, lambda a=attempt: status_label.config(text=f"시도 {a}: Teacher가 자기소개서를 채점 중입니다...", fg="#8E44AD"))
-                result = grade_cover_letter()
-
-                if result == "yes":
-                    root.after(0, lambda: status_label.config(text="최종 합격: 자기소개서 작성이 완료되었습니다!", fg="green"))
-                    root.after(0, lambda: messagebox.showinfo("축하합니다!", f"{attempt}번의 수정 끝에 Teacher 에이전트의 승인을 받았습니다.\n결과: res/result.txt"))
-                    break
-                elif result == "no":
-                    attempt += 1
-                    root.after(0, lambda a=attempt: status_label.config(text=f"재작성: 점수가 낮아 다시 작성합니다. (시도 {a})", fg="#E67E22"))
-                    time_sleep = 2 # 잠깐의 대기
-                    continue
-                else:
-                    raise Exception("Teacher 에이전트가 점수를 산출하지 못했습니다. (error)")
-
-        except Exception as e:
-            error_msg = str(e)
-            root.after(0, lambda msg=error_msg: status_label.config(text=f"작성 오류: {msg}", fg="red"))
-            root.after(0, lambda msg=error_msg: messagebox.showerror("실패", msg))
+            run_gui_job(
+                GUI_WRITING_KIND, payload, WRITING_DEADLINE_SECONDS,
+                lambda checkpoint: run_writing_loop(set_status, checkpoint),
+                on_success, "작성 오류",
+            )
         finally:
             root.after(0, lambda: writer_button.config(state=tk.NORMAL))
 
-    threading.Thread(target=run_writing_loop, daemon=True).start()
+    threading.Thread(target=run_process, daemon=True).start()
 
 # --- GUI 레이아웃 설정 ---
-root = tk.Tk()
-root.title("AI 자소서 자동화 시스템 (Agentic Workflow)")
-root.geometry("620x550")
-root.resizable(False, False)
-
-frame = tk.Frame(root, padx=30, pady=20)
-frame.pack(expand=True, fill="both")
-
-# 1. URL 입력 섹션
-tk.Label(frame, text="1. 채용공고 분석", font=("Malgun Gothic", 11, "bold")).pack(anchor="w", pady=(0, 5))
-url_entry = tk.Entry(frame, width=72, font=("Consolas", 10))
-url_entry.pack(pady=(0, 15))
-url_entry.insert(0, "https://") 
-
-# 2. 파일 업로드 섹션
-tk.Label(frame, text="2. 지원자 서류 등록", font=("Malgun Gothic", 11, "bold")).pack(anchor="w", pady=(0, 10))
-file_frame = tk.Frame(frame)
-file_frame.pack(fill="x", pady=(0, 15))
-
-resume_btn = tk.Button(file_frame, text="이력서 등록", command=select_resume, width=15)
-resume_btn.grid(row=0, column=0, padx=(0, 10), pady=5)
-resume_label = tk.Label(file_frame, text="선택된 파일 없음", fg="gray", font=("Malgun Gothic", 9))
-resume_label.grid(row=0, column=1, sticky="w")
-
-portfolio_btn = tk.Button(file_frame, text="포트폴리오 등록", command=select_portfolio, width=15)
-portfolio_btn.grid(row=1, column=0, padx=(0, 10), pady=5)
-portfolio_label = tk.Label(file_frame, text="선택된 파일 없음", fg="gray", font=("Malgun Gothic", 9))
-portfolio_label.grid(row=1, column=1, sticky="w")
-
-# 3. 실행 버튼 섹션
-tk.Label(frame, text="3. AI 에이전트 실행", font=("Malgun Gothic", 11, "bold")).pack(anchor="w", pady=(0, 10))
-
-button_container = tk.Frame(frame)
-button_container.pack(pady=5)
-
-analysis_button = tk.Button(
-    button_container, 
-    text="Step 1: 통합 분석 시작", 
-    command=start_analysis_workflow,
-    bg="#34495E", fg="white", font=("Malgun Gothic", 10, "bold"),
-    width=25, height=2, cursor="hand2"
-)
-analysis_button.pack(side="left", padx=5)
-
-writer_button = tk.Button(
-    button_container, 
-    text="Step 2: 자기소개서 작성 시작", 
-    command=start_writing_workflow,
-    bg="#2980B9", fg="white", font=("Malgun Gothic", 10, "bold"),
-    width=25, height=2, cursor="hand2",
-    state=tk.NORMAL # 분석 데이터가 이미 있다면 바로 실행 가능하도록 NORMAL 유지
-)
-writer_button.pack(side="left", padx=5)
-
-status_label = tk.Label(frame, text="원하는 작업을 선택해주세요.", font=("Malgun Gothic", 10), fg="gray", wraplength=500)
-status_label.pack(pady=20)
+def build_gui():
+    """
+    Tk 창과 위젯을 생성합니다.
+    import 시점이 아니라 __main__에서 호출되므로, 이 모듈을 import해도 창이 만들어지지 않습니다.
+    """
+    global root, url_entry, resume_label, portfolio_label, analysis_button, writer_button, status_label
+    global job_queue
+
+    job_queue = JobQueue()
+
+    root = tk.Tk()
+    root.title("AI 자소서 자동화 시스템 (Agentic Workflow)")
+    root.geometry("620x600")
+    root.resizable(False, False)
+
+    frame = tk.Frame(root, padx=30, pady=20)
+    frame.pack(expand=True, fill="both")
+
+    # 1. URL 입력 섹션
+    tk.Label(frame, text="1. 채용공고 분석", font=("Malgun Gothic", 11, "bold")).pack(anchor="w", pady=(0, 5))
+    url_entry = tk.Entry(frame, width=72, font=("Consolas", 10))
+    url_entry.pack(pady=(0, 15))
+    url_entry.insert(0, "https://") 
+
+    # 2. 파일 업로드 섹션
+    tk.Label(frame, text="2. 지원자 서류 등록", font=("Malgun Gothic", 11, "bold")).pack(anchor="w", pady=(0, 10))
+    file_frame = tk.Frame(frame)
+    file_frame.pack(fill="x", pady=(0, 15))
+
+    resume_btn = tk.Button(file_frame, text="이력서 등록", command=select_resume, width=15)
+    resume_btn.grid(row=0, column=0, padx=(0, 10), pady=5)
+    resume_label = tk.Label(file_frame, text="선택된 파일 없음", fg="gray", font=("Malgun Gothic", 9))
+    resume_label.grid(row=0, column=1, sticky="w")
+
+    portfolio_btn = tk.Button(file_frame, text="포트폴리오 등록", command=select_portfolio, width=15)
+    portfolio_btn.grid(row=1, column=0, padx=(0, 10), pady=5)
+    portfolio_label = tk.Label(file_frame, text="선택된 파일 없음", fg="gray", font=("Malgun Gothic", 9))
+    portfolio_label.grid(row=1, column=1, sticky="w")
+
+    # 3. 실행 버튼 섹션
+    tk.Label(frame, text="3. AI 에이전트 실행", font=("Malgun Gothic", 11, "bold")).pack(anchor="w", pady=(0, 10))
+
+    button_container = tk.Frame(frame)
+    button_container.pack(pady=5)
+
+    analysis_button = tk.Button(
+        button_container, 
+        text="Step 1: 통합 분석 시작", 
+        command=start_analysis_workflow,
+        bg="#34495E", fg="white", font=("Malgun Gothic", 10, "bold"),
+        width=25, height=2, cursor="hand2"
+    )
+    analysis_button.pack(side="left", padx=5)
+
+    writer_button = tk.Button(
+        button_container, 
+        text="Step 2: 자기소개서 작성 시작", 
+        command=start_writing_workflow,
+        bg="#2980B9", fg="white", font=("Malgun Gothic", 10, "bold"),
+        width=25, height=2, cursor="hand2",
+        state=tk.NORMAL # 분석 데이터가 이미 있다면 바로 실행 가능하도록 NORMAL 유지
+    )
+    writer_button.pack(side="left", padx=5)
+
+    stop_button = tk.Button(
+        frame,
+        text="중지",
+        command=stop_workflows,
+        bg="#C0392B", fg="white", font=("Malgun Gothic", 10, "bold"),
+        width=12, cursor="hand2"
+    )
+    stop_button.pack(pady=(10, 0))
+
+    status_label = tk.Label(frame, text="원하는 작업을 선택해주세요.", font=("Malgun Gothic", 10), fg="gray", wraplength=500)
+    status_label.pack(pady=20)
+    return root
 
 if __name__ == "__main__":
-    root.mainloop()
+    # python main.py --profile: 단계별 CPU/메모리 프로파일을 res/profile/에 저장 (PROFILE=1과 같음)
+    if "--profile" in sys.argv[1:]:
+        enable_profiling()
+    build_gui().mainloop()
@@ -0,0 +1,39 @@
+"""Writer가 실제로 쓰는 소제목 형식을 DraftLinter가 모두 항목으로 나누는지 확인합니다."""
+import os
+import re
+
+from DraftLinter import split_sections
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _writer_draft():
+    with open(os.path.join(REPO_DIR, "res", "result_attempt1.txt"), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _assert_four_sections(draft):
+    sections = split_sections(draft)
+    assert sorted(sections) == [1, 2, 3, 4]
+    assert sections[1][0] == "지원동기"
+    assert sections[4][0] == "성격의 장단점"
+    # 소제목 아래의 굵은 글씨 한 줄('**[10만 데이터...]**')은 본문에 남습니다.
+    assert sections[2][1].startswith("**[10만 데이터")
+
+
+def test_markdown_heading():
+    _assert_four_sections(_writer_draft())
+
+
+def test_bold_markdown_heading():
+    _assert_four_sections(re.sub(r"(?m)^### (\d\. .+)$", r"### **\1**", _writer_draft()))
+
+
+def test_bracket_number_heading():
+    _assert_four_sections(re.sub(r"(?m)^### (\d)\. ", r"#### [\1] ", _writer_draft()))
+
+
+def test_numbered_bold_line_in_body_is_not_a_heading():
+    draft = _writer_draft().replace("### 3. 직무 관련 역량/경험 2", "**3. 직무 관련 역량/경험 2**")
+    sections = split_sections(draft)
+    assert 3 not in sections and 4 not in sections
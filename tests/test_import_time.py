@@ -0,0 +1,46 @@
+"""
+헤드리스 워커의 시작 비용 예산을 확인합니다.
+selenium/bs4/python-docx/requests/tkinter는 실제로 쓰는 단계에서만 import되어야 하고,
+Pipeline과 Worker를 import하는 데 걸리는 시간은 IMPORT_BUDGET_MS 안이어야 합니다.
+"""
+import os
+import sys
+import json
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 현재 약 90ms. 무거운 의존성 하나만 import 시점으로 옮겨져도 넘는 값입니다.
+IMPORT_BUDGET_MS = 400
+DEFERRED_MODULES = ["selenium", "bs4", "docx", "requests", "tkinter"]
+
+_SCRIPT = (
+    "import sys, json, Pipeline, Worker; "
+    f"print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))"
+)
+
+
+def _import_pipeline_and_worker():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _SCRIPT],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True,
+    )
+    # -X importtime 출력: "import time: self [us] | cumulative | imported package"
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            cumulative[parts[2].rstrip()] = int(parts[1])
+    return json.loads(result.stdout.strip().splitlines()[-1]), cumulative
+
+
+def test_heavy_dependencies_are_not_imported_at_startup():
+    loaded, _ = _import_pipeline_and_worker()
+    assert loaded == []
+
+
+def test_import_time_within_budget():
+    _, cumulative = _import_pipeline_and_worker()
+    total_ms = (cumulative.get(" Pipeline", 0) + cumulative.get(" Worker", 0)) / 1000
+    assert cumulative.get(" Pipeline"), "Pipeline import가 -X importtime 출력에 없습니다."
+    assert total_ms < IMPORT_BUDGET_MS, f"Pipeline + Worker import {total_ms:.0f}ms > 예산 {IMPORT_BUDGET_MS}ms"
@@ -0,0 +1,70 @@
+"""lease를 잃은 소유자가 다른 소유자가 다시 가져간 작업을 덮어쓰지 않는지 확인합니다."""
+import time
+
+from JobQueue import JobQueue, JobCheckpoint
+
+
+def _expire_lease(queue, job_id):
+    with queue._connect() as conn:
+        conn.execute("UPDATE jobs SET lease_until = ? WHERE id = ?", (time.time() - 1, job_id))
+
+
+def test_stale_owner_cannot_update_released_job(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.db"))
+    job_id = queue.enqueue("full", {"url": "https://example.com"})
+    assert queue.lease("old")["id"] == job_id
+    _expire_lease(queue, job_id)
+    assert queue.lease("new")["id"] == job_id
+
+    stale = JobCheckpoint(queue, job_id, "old")
+    assert not stale.save("analysis", {"done": False})
+    assert not queue.complete(job_id, "old")
+    assert queue.fail(job_id, "error", owner="old") is None
+    assert not queue.mark_cancelled(job_id, "cancelled", "old")
+    assert not queue.release(job_id, "stopped", "old")
+    job = queue.get(job_id)
+    assert (job["status"], job["lease_owner"]) == ("leased", "new")
+    assert queue.load_checkpoint(job_id, "analysis") is None
+
+    assert JobCheckpoint(queue, job_id, "new").save("analysis", {"done": True})
+    assert queue.complete(job_id, "new")
+    assert queue.get(job_id)["status"] == "done"
+    assert queue.load_checkpoint(job_id, "analysis") == {"done": True}
+
+
+def test_worker_stops_without_writing_status_after_losing_lease(tmp_path, monkeypatch):
+    import Worker
+    from RunContext import RunCancelled
+
+    queue = JobQueue(str(tmp_path / "queue.db"))
+    job_id = queue.enqueue("analysis", {"output_dir": str(tmp_path / "out")})
+    job = queue.lease("old")
+
+    def lose_lease(*args, **kwargs):
+        # 실행 도중 lease가 만료되어 다른 워커가 다시 가져간 상황
+        _expire_lease(queue, job_id)
+        queue.lease("new")
+        raise RunCancelled("lease를 잃었습니다.")
+
+    monkeypatch.setattr(Worker, "run_analysis", lose_lease)
+    assert not Worker.run_job(queue, job, "old")
+    job = queue.get(job_id)
+    assert (job["status"], job["lease_owner"]) == ("leased", "new")
+
+
+def test_jobs_sharing_res_folder_run_one_at_a_time(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.db"))
+    analysis = queue.enqueue("analysis", {"url": "https://example.com/1"})
+    writing = queue.enqueue("writing", {})
+    separate = queue.enqueue("analysis", {"output_dir": str(tmp_path / "out")})
+    full = queue.enqueue("full", {"url": "https://example.com/2"})
+
+    assert queue.lease("a")["id"] == analysis
+    # 공유 res 작업(writing)은 건너뛰고 결과 폴더가 따로 있는 작업만 가져갑니다.
+    assert queue.lease("b")["id"] == separate
+    assert queue.lease("c")["id"] == full
+    assert queue.lease("d") is None
+    assert queue.lease("gui", job_id=writing) is None
+
+    assert queue.complete(analysis, "a")
+    assert queue.lease("d")["id"] == writing
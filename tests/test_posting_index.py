@@ -0,0 +1,70 @@
+"""같은 기업의 다른 직무 공고가 이전 분석 결과 전체를 재사용하지 않는지 확인합니다."""
+import os
+
+import Agent_CompanyAnalyzer
+from PostingIndex import (PostingIndex, DUPLICATE_THRESHOLD, minhash, shingles, estimate_similarity,
+                          is_same_posting, same_company)
+from RunContext import RunContext, use_run
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BACKEND_ROLE = """담당업무
+- Java/Spring API 개발
+- 주문/결제 서버 운영
+자격요건
+- 백엔드 개발 경력 3년 이상"""
+
+ACCOUNTING_ROLE = """담당업무
+- 월말 결산 및 세무 신고
+- 전표 검토
+자격요건
+- 회계 실무 경력 3년 이상"""
+
+
+def _read(path):
+    with open(os.path.join(REPO_DIR, path), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _posting(role, deadline="D-14"):
+    """저장소의 샘플 공고(사람인 페이지)에 직무 부분만 바꿔 넣은 공고를 만듭니다."""
+    lines = _read(os.path.join("res", "job_description.txt")).replace("D-14", deadline).splitlines()
+    return "\n".join(lines[:30] + role.splitlines() + lines[30:])
+
+
+def test_different_roles_are_not_the_same_posting():
+    backend, accounting = _posting(BACKEND_ROLE), _posting(ACCOUNTING_ROLE)
+    # 채용 사이트 공통 문구 때문에 유사도만으로는 같은 공고처럼 보입니다.
+    assert estimate_similarity(minhash(shingles(backend)), minhash(shingles(accounting))) >= DUPLICATE_THRESHOLD
+    assert same_company(_read(os.path.join("res", "Company_data.txt")), accounting)
+    assert not is_same_posting(accounting, backend)
+    assert not is_same_posting(backend, backend + "\n- 추가 우대사항")
+
+
+def test_only_deadline_changed_is_the_same_posting():
+    assert is_same_posting(_posting(BACKEND_ROLE, "D-13"), _posting(BACKEND_ROLE))
+
+
+def test_analyzer_reanalyzes_role_for_same_company_posting(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    company_data = _read(os.path.join("res", "Company_data.txt"))
+    PostingIndex().add(_posting(BACKEND_ROLE), company_data)
+
+    prompts = []
+
+    def fake_call(prompt, system_instruction=""):
+        prompts.append(prompt)
+        return "2. 직무명과 업무 내용\n회계\n\n3. 직무별 자격요건 & 우대 사항\n회계 실무"
+
+    monkeypatch.setattr(Agent_CompanyAnalyzer, "call_gemini_api", fake_call)
+    run = RunContext(output_dir=str(tmp_path / "out"))
+    with open(run.output_path("job_description.txt"), "w", encoding="utf-8") as f:
+        f.write(_posting(ACCOUNTING_ROLE))
+
+    with use_run(run):
+        assert Agent_CompanyAnalyzer.analyze_company_info()
+
+    # 분석 결과 전체를 재사용하지 않고, 달라진 직무 부분만 다시 분석합니다.
+    assert len(prompts) == 1 and "월말 결산" in prompts[0] and "Java/Spring" not in prompts[0]
+    with open(run.output_path("Company_data.txt"), "r", encoding="utf-8") as f:
+        assert "회계 실무" in f.read()
@@ -0,0 +1,11 @@
+"""체크포인트에 저장한 memo 값으로 재시작하면 다시 계산하지 않는지 확인합니다."""
+from PromptCache import LocalPromptCache
+
+
+def test_seeded_value_is_reused_after_restart():
+    first = LocalPromptCache()
+    assert first.remember("teacher_criteria:abc", lambda: "채점 항목 A") == "채점 항목 A"
+
+    resumed = LocalPromptCache()
+    resumed.seed(first.remembered())
+    assert resumed.remember("teacher_criteria:abc", lambda: "채점 항목 B") == "채점 항목 A"